@@ -0,0 +1,240 @@
+// Clientside callbacks for main.py and example.py.
+//
+// These callbacks only map store values to styles and labels, so they run in
+// the browser instead of costing a round trip to the server. Dash serves
+// everything in assets/ automatically; each app uses its own namespace.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    main: {
+        set_mode: function (n_learn, n_quiz) {
+            var triggered = dash_clientside.callback_context.triggered;
+            if (!triggered.length) {
+                return dash_clientside.no_update;
+            }
+            var trig_id = triggered[0].prop_id.split(".")[0];
+            if (trig_id === "mode-learning-button" && n_learn) {
+                return "learn";
+            } else if (trig_id === "mode-quiz-button" && n_quiz) {
+                return "quiz";
+            }
+            return dash_clientside.no_update;
+        },
+
+        display_country_name: function (current_country, show_name, mode) {
+            if (!current_country) {
+                return ["Select a region to start", ""];
+            }
+            if (mode === "learn") {
+                return [current_country, ""];
+            } else if (mode === "quiz") {
+                return ["", show_name ? current_country : "?"];
+            }
+            return [dash_clientside.no_update, dash_clientside.no_update];
+        },
+
+        switch_screens: function (mode, selected_cat) {
+            return screen_styles(mode, selected_cat, ["learn", "quiz"]);
+        },
+
+        // The two callbacks below are only registered with CLIENTSIDE_MAPS=1
+
+        navigate_countries: function (n_next, n_back, n_quiz_next, n_show, current_idx, category, seed,
+                                      mode, bundle_url) {
+            var no_update = dash_clientside.no_update;
+            var triggered = dash_clientside.callback_context.triggered;
+            if (!triggered.length || !category || seed === null || seed === undefined) {
+                return [no_update, no_update, no_update];
+            }
+            var trig_id = triggered[0].prop_id.split(".")[0];
+            // The session's order is rebuilt from the seed, like session_countries in main.py
+            return load_bundle(bundle_url + encodeURIComponent(category) + ".json").then(function (bundle) {
+                var countries_list = shuffled(bundle.order, seed);
+                var n = countries_list.length;
+                var new_idx;
+                if (!n) {
+                    return [no_update, no_update, no_update];
+                }
+                if (trig_id === "next-button" || trig_id === "quiz-next-button") {
+                    new_idx = (current_idx + 1) % n;
+                    return [new_idx, countries_list[new_idx], false];
+                } else if (trig_id === "back-button") {
+                    new_idx = ((current_idx - 1) % n + n) % n;
+                    return [new_idx, countries_list[new_idx], false];
+                } else if (trig_id === "show-button") {
+                    return [current_idx, countries_list[current_idx], true];
+                }
+                return [no_update, no_update, no_update];
+            });
+        },
+
+        update_map: function (current_country, mode, category, bundle_url) {
+            var no_update = dash_clientside.no_update;
+            if ((mode !== "learn" && mode !== "quiz") || !category) {
+                return [no_update, no_update];
+            }
+            return load_bundle(bundle_url + encodeURIComponent(category) + ".json").then(function (bundle) {
+                var figure = map_figure(bundle, current_country, mode);
+                return mode === "learn" ? [figure, no_update] : [no_update, figure];
+            });
+        }
+    },
+
+    example: {
+        set_mode: function (n_learn, n_quiz) {
+            var triggered = dash_clientside.callback_context.triggered;
+            if (!triggered.length) {
+                return dash_clientside.no_update;
+            }
+            var trig_id = triggered[0].prop_id.split(".")[0];
+            if (trig_id === "mode-learning-button" && n_learn) {
+                return "learning";
+            } else if (trig_id === "mode-quiz-button" && n_quiz) {
+                return "quiz";
+            }
+            return dash_clientside.no_update;
+        },
+
+        switch_screens: function (mode, selected_cat) {
+            return screen_styles(mode, selected_cat, ["quiz", "learning"]);
+        }
+    }
+});
+
+// Styles for the mode card, the category card and one card per mode (in the
+// order of `modes`); exactly one of them is visible.
+function screen_styles(mode, selected_cat, modes) {
+    var hidden = {"display": "none"};
+    var menu = {"maxWidth": "600px", "margin": "0 auto 2rem auto", "display": "block"};
+    var card = {"maxWidth": "900px", "margin": "0 auto 2rem auto", "display": "block"};
+    if (mode === null || mode === undefined) {
+        return [menu, hidden].concat(modes.map(function () { return hidden; }));
+    }
+    if (selected_cat === null || selected_cat === undefined) {
+        return [hidden, menu].concat(modes.map(function () { return hidden; }));
+    }
+    if (modes.indexOf(mode) < 0) {
+        return [dash_clientside.no_update, dash_clientside.no_update].concat(
+            modes.map(function () { return dash_clientside.no_update; }));
+    }
+    return [hidden, hidden].concat(modes.map(function (m) { return m === mode ? card : hidden; }));
+}
+
+// Geometry bundles (see geometry_bundle in main.py) by URL. The URL contains
+// the data version, so a fetched bundle is valid for the whole page life.
+var geometry_bundles = {};
+
+function load_bundle(url) {
+    if (!geometry_bundles[url]) {
+        geometry_bundles[url] = fetch(url).then(function (response) {
+            if (!response.ok) {
+                throw new Error("Could not load " + url + ": " + response.status);
+            }
+            return response.json();
+        }).catch(function (error) {
+            delete geometry_bundles[url];
+            throw error;
+        });
+    }
+    return geometry_bundles[url];
+}
+
+// GeoJSON MultiPolygon coordinates from RingSet.delta_encode() in geometry.py
+function decode_polygons(encoded) {
+    var scale = Math.pow(10, encoded.decimals);
+    var deltas = encoded.deltas;
+    var k = 0;
+    return encoded.layout.map(function (polygon) {
+        return polygon.map(function (n) {
+            var ring = [];
+            var x = 0, y = 0;
+            for (var i = 0; i < n; i++) {
+                x += deltas[k++];
+                y += deltas[k++];
+                ring.push([x / scale, y / scale]);
+            }
+            return ring;
+        });
+    });
+}
+
+// Port of build_map_figure in main.py, drawing a country_map_spec()
+function map_figure(bundle, current_country, mode) {
+    var learn = mode === "learn";
+    var layout = JSON.parse(JSON.stringify(bundle.layout));
+    var data = [];
+    layout.title = {"text": learn ? "Learn Mode" : "Quiz Mode"};
+
+    var spec = bundle.countries[current_country];
+    if (!spec) {
+        return {"data": data, "layout": layout};
+    }
+    var name = spec.name;
+
+    if (spec.kind === "microstates") {
+        layout.title.text = learn ? "European Microstates (Selected: " + name + ")" : "Quiz: European Microstates";
+        bundle.microstates.forEach(function (marker) {
+            var trace = {
+                "type": "scattermapbox", "lat": [marker[1]], "lon": [marker[2]], "name": marker[0]
+            };
+            if (learn) {
+                trace.mode = "markers+text";
+                trace.marker = {"size": 12, "color": marker[0] === name ? "darkviolet" : "blue"};
+                trace.text = [marker[0]];
+                trace.textposition = "top right";
+                trace.textfont = {"size": 10};
+            } else {
+                trace.mode = "markers";
+                trace.marker = {"size": 12, "color": marker[0] === name ? "orange" : "red"};
+            }
+            data.push(trace);
+        });
+    } else if (spec.kind === "dot") {
+        layout.title.text = (learn ? "Learn: " : "Quiz: ") + name;
+        data.push({
+            "type": "scattermapbox", "lat": [spec.center.lat], "lon": [spec.center.lon],
+            "mode": "markers", "marker": {"size": 10, "color": learn ? "blue" : "red"}, "name": name
+        });
+    } else {
+        layout.title.text = (learn ? "Learn: " : "Quiz: ") + name;
+        var color = learn ? spec.learn_color : "red";
+        data.push({
+            "type": "choroplethmapbox",
+            "geojson": {
+                "type": "Feature", "id": name,
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": Array.isArray(spec.polygons) ? spec.polygons : decode_polygons(spec.polygons)
+                }
+            },
+            "locations": [name], "z": [1],
+            "colorscale": [[0, color], [1, color]], "showscale": false,
+            "marker": {"opacity": 0.6, "line": {"width": 2, "color": color}},
+            "name": name
+        });
+    }
+    layout.mapbox.center = spec.center;
+    layout.mapbox.zoom = spec.zoom;
+    return {"data": data, "layout": layout};
+}
+
+// Seeded shuffle, a bit-for-bit port of shuffle.py
+function mulberry32(seed) {
+    var state = seed | 0;
+    return function () {
+        state = state + 0x6D2B79F5 | 0;
+        var t = Math.imul(state ^ state >>> 15, state | 1);
+        t = t + Math.imul(t ^ t >>> 7, t | 61) ^ t;
+        return ((t ^ t >>> 14) >>> 0) / 4294967296;
+    };
+}
+
+function shuffled(items, seed) {
+    var result = items.slice();
+    var rand = mulberry32(seed);
+    for (var i = result.length - 1; i > 0; i--) {
+        var j = Math.floor(rand() * (i + 1));
+        var item = result[i];
+        result[i] = result[j];
+        result[j] = item;
+    }
+    return result;
+}
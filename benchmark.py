@@ -0,0 +1,394 @@
+"""Load-testing benchmark for the Dash callback endpoints.
+
+Starts one of the apps under gunicorn (or targets a running server with
+--url), then replays realistic sessions against /_dash-update-component the
+way the browser would: a small client reads /_dash-layout and
+/_dash-dependencies, keeps every component property in memory, fires the
+server callbacks whose inputs changed and feeds their outputs back in, so
+chained callbacks run exactly as in the browser. Clientside callbacks are
+not executed; scenarios set the values they would produce directly.
+
+    python benchmark.py --app main --sessions 50 --concurrency 8 --clicks 30
+    python benchmark.py --app example --cwd /path/to/topic/json/files
+    python benchmark.py --url http://127.0.0.1:8080 --app main --json out.json
+
+Reports p50/p95/p99 latency, requests per second and request/response bytes
+per callback (callbacks are named after their outputs). Response bytes are
+counted as sent, i.e. compressed when the server compresses them.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+###############################################################################
+# DASH CLIENT
+###############################################################################
+def _split_outputs(output):
+    """[(id, property), ...] for a dependency's output string"""
+    if output.startswith(".."):
+        parts = output[2:-2].split("...")
+    else:
+        parts = [output]
+    return [tuple(part.rsplit(".", 1)) for part in parts]
+
+
+def _walk_layout(node, props):
+    """Collect {"id.prop": value} for every component with an id"""
+    if isinstance(node, list):
+        for child in node:
+            _walk_layout(child, props)
+        return
+    if not isinstance(node, dict) or "props" not in node:
+        return
+    component_props = node["props"]
+    component_id = component_props.get("id")
+    for prop, value in component_props.items():
+        if component_id is not None and isinstance(component_id, str):
+            props[f"{component_id}.{prop}"] = value
+        if isinstance(value, (dict, list)):
+            _walk_layout(value, props)
+
+
+def _patch_location(location, value):
+    # Negative list indices count from the end, like in dash-renderer
+    path = []
+    for key in location:
+        if isinstance(key, int) and key < 0 and isinstance(value, list):
+            key += len(value)
+        path.append(key)
+        value = value[key] if value is not None else None
+    return path
+
+
+def _apply_patch(previous, patch):
+    """Result of a dash.Patch update (see handlePatch in dash-renderer) on a prop value"""
+    # Wrapped so that operations on the value itself (location []) have a parent
+    holder = {"value": json.loads(json.dumps(previous))}
+    for op in patch["operations"]:
+        path = ["value"] + _patch_location(op["location"], holder["value"])
+        parent = holder
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+        name = op["operation"]
+        params = op["params"]
+        if name == "Assign":
+            parent[key] = params["value"]
+        elif name == "Delete":
+            del parent[key]
+        elif name == "Merge":
+            parent[key] = dict(parent[key], **params["value"])
+        elif name == "Extend":
+            parent[key] = parent[key] + params["value"]
+        elif name == "Append":
+            parent[key] = parent[key] + [params["value"]]
+        elif name == "Prepend":
+            parent[key] = [params["value"]] + parent[key]
+        elif name == "Insert":
+            index = params["index"]
+            parent[key].insert(index + len(parent[key]) if index < 0 else index, params["value"])
+        elif name == "Remove":
+            parent[key] = [item for item in parent[key] if item != params["value"]]
+        elif name == "Clear":
+            parent[key] = type(parent[key])()
+        elif name == "Reverse":
+            parent[key] = parent[key][::-1]
+        elif name in ("Add", "Sub", "Mul", "Div"):
+            operand = params["value"]
+            parent[key] = {"Add": lambda x: x + operand, "Sub": lambda x: x - operand,
+                           "Mul": lambda x: x * operand, "Div": lambda x: x / operand}[name](parent[key])
+        else:
+            raise ValueError(f"unknown patch operation {name}")
+    return holder["value"]
+
+
+class Recorder:
+    """Thread-safe per-callback samples of latency and payload size"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, name, seconds, request_bytes, response_bytes, ok):
+        with self._lock:
+            if ok:
+                self.samples[name].append((seconds, request_bytes, response_bytes))
+            else:
+                self.errors[name] += 1
+
+
+class DashClient:
+    """Minimal stand-in for dash-renderer driving one browser session"""
+
+    def __init__(self, url, layout, dependencies, recorder):
+        self.url = url.rstrip("/")
+        self.http = requests.Session()
+        self.recorder = recorder
+        self.props = {}
+        _walk_layout(layout, self.props)
+        self.callbacks = [dep for dep in dependencies if not dep.get("clientside_function")]
+        for dep in self.callbacks:
+            dep["_outputs"] = _split_outputs(dep["output"])
+            dep["_name"] = "+".join(f"{i}.{p.split('@')[0]}" for i, p in dep["_outputs"])
+
+    def get(self, component_id, prop):
+        return self.props.get(f"{component_id}.{prop}")
+
+    def start(self):
+        """Fire the initial callbacks, upstream ones first, like a page load"""
+        pending = [dep for dep in self.callbacks if not dep.get("prevent_initial_call")]
+        while pending:
+            produced = {f"{i}.{p.split('@')[0]}" for dep in pending for i, p in dep["_outputs"]}
+            ready = [dep for dep in pending
+                     if not any(f"{x['id']}.{x['property']}" in produced for x in dep["inputs"])]
+            ready = ready or pending[:1]
+            for dep in ready:
+                pending.remove(dep)
+                self._fire(dep, [])
+
+    def click(self, component_id):
+        n_clicks = (self.get(component_id, "n_clicks") or 0) + 1
+        self.set(component_id, "n_clicks", n_clicks)
+
+    def set(self, component_id, prop, value):
+        """Change a property and run every server callback that depends on it"""
+        key = f"{component_id}.{prop}"
+        self.props[key] = value
+        self._propagate({key})
+
+    def _propagate(self, changed):
+        while changed:
+            next_changed = set()
+            for dep in self.callbacks:
+                triggers = [f"{x['id']}.{x['property']}" for x in dep["inputs"]
+                            if f"{x['id']}.{x['property']}" in changed]
+                if triggers:
+                    next_changed |= self._fire(dep, triggers)
+            changed = next_changed
+
+    def _fire(self, dep, triggers):
+        body = {
+            "output": dep["output"],
+            "outputs": ([{"id": i, "property": p} for i, p in dep["_outputs"]]
+                        if dep["output"].startswith("..")
+                        else {"id": dep["_outputs"][0][0], "property": dep["_outputs"][0][1]}),
+            "inputs": [dict(x, value=self.get(x["id"], x["property"])) for x in dep["inputs"]],
+            "state": [dict(x, value=self.get(x["id"], x["property"])) for x in dep["state"]],
+            "changedPropIds": triggers,
+        }
+        payload = json.dumps(body).encode("utf-8")
+        start = time.perf_counter()
+        response = self.http.post(f"{self.url}/_dash-update-component", data=payload,
+                                  headers={"Content-Type": "application/json"})
+        elapsed = time.perf_counter() - start
+        ok = response.status_code in (200, 204)
+        # requests decodes gzip/br bodies; Content-Length is the size on the wire
+        sent = int(response.headers.get("Content-Length", len(response.content)))
+        self.recorder.add(dep["_name"], elapsed, len(payload), sent, ok)
+        if response.status_code != 200:
+            return set()
+        changed = set()
+        for component_id, values in response.json().get("response", {}).items():
+            for prop, value in values.items():
+                key = f"{component_id}.{prop}"
+                if isinstance(value, dict) and "__dash_patch_update" in value:
+                    value = _apply_patch(self.props.get(key), value)
+                self.props[key] = value
+                changed.add(key)
+        return changed
+
+
+###############################################################################
+# SCENARIOS
+###############################################################################
+def scenario_main(client, rng, clicks):
+    """Pick a mode and region, then click through countries"""
+    mode = rng.choice(["learn", "quiz"])
+    # set_mode runs clientside
+    client.set("store-mode", "data", mode)
+    options = client.get("category-dropdown", "options") or []
+    if not options:
+        return
+    client.set("category-dropdown", "value", rng.choice(options)["value"])
+    client.click("category-next-button")
+    for _ in range(clicks):
+        if mode == "learn":
+            client.click(rng.choice(["next-button", "next-button", "back-button"]))
+        else:
+            client.click("show-button")
+            client.click("quiz-next-button")
+    client.click("learn-return-button" if mode == "learn" else "quiz-return-button")
+
+
+def scenario_example(client, rng, clicks):
+    """Start a quiz in a random category and answer `clicks` guesses"""
+    # set_mode runs clientside
+    client.set("store-mode", "data", "quiz")
+    options = client.get("category-dropdown", "options") or []
+    if not options:
+        return
+    client.set("category-dropdown", "value", rng.choice(options)["value"])
+    client.click("category-next-button")
+    for _ in range(clicks):
+        current = client.get("store-selected-feature", "data")
+        if current is None:
+            break
+        guesses = [o["value"] for o in client.get("feature-guess-dropdown", "options") or []]
+        guess = current if rng.random() < 0.7 or not guesses else rng.choice(guesses)
+        client.set("feature-guess-dropdown", "value", guess)
+        client.click("guess-button")
+    client.click("back-button")
+
+
+SCENARIOS = {"main": scenario_main, "example": scenario_example}
+
+
+###############################################################################
+# SERVER
+###############################################################################
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app, workers, threads, cwd):
+    """Launch `gunicorn <app>:server` on a free port and wait until it answers"""
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BASE_DIR, os.environ.get("PYTHONPATH")])))
+    cmd = [sys.executable, "-m", "gunicorn", f"{app}:server",
+           "--config", os.path.join(BASE_DIR, "gunicorn.conf.py"),
+           "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+           "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=cwd or BASE_DIR, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            # /readyz only answers 200 once the app's warm-up has finished
+            if requests.get(f"{url}/readyz", timeout=1).status_code == 200:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("server did not come up within 120 s")
+
+
+###############################################################################
+# REPORT
+###############################################################################
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, wall_time):
+    callbacks = {}
+    total = 0
+    for name in sorted(set(recorder.samples) | set(recorder.errors)):
+        samples = recorder.samples.get(name, [])
+        latencies = sorted(s[0] * 1000.0 for s in samples)
+        n = len(samples)
+        total += n + recorder.errors.get(name, 0)
+        callbacks[name] = {
+            "requests": n,
+            "errors": recorder.errors.get(name, 0),
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "p99_ms": _percentile(latencies, 99),
+            "request_bytes": sum(s[1] for s in samples) / n if n else 0,
+            "response_bytes": sum(s[2] for s in samples) / n if n else 0,
+        }
+    return {
+        "wall_time_s": wall_time,
+        "requests": total,
+        "requests_per_s": total / wall_time if wall_time else 0.0,
+        "callbacks": callbacks,
+    }
+
+
+def print_report(summary):
+    print(f"\n{summary['requests']} requests in {summary['wall_time_s']:.2f} s "
+          f"({summary['requests_per_s']:.1f} req/s)\n")
+    header = f"{'callback':<60} {'n':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req B':>8} {'resp B':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, row in summary["callbacks"].items():
+        label = name if len(name) <= 60 else name[:57] + "..."
+        print(f"{label:<60} {row['requests']:>6} {row['errors']:>4} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['request_bytes']:>8.0f} "
+              f"{row['response_bytes']:>9.0f}")
+
+
+###############################################################################
+# RUN
+###############################################################################
+def run(url, app, sessions, concurrency, clicks, seed):
+    layout = requests.get(f"{url}/_dash-layout").json()
+    dependencies = requests.get(f"{url}/_dash-dependencies").json()
+    recorder = Recorder()
+    scenario = SCENARIOS[app]
+
+    def session(i):
+        client = DashClient(url, layout, json.loads(json.dumps(dependencies)), recorder)
+        client.start()
+        scenario(client, random.Random(seed + i), clicks)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(session, i) for i in range(sessions)]:
+            future.result()
+    return summarize(recorder, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", choices=sorted(SCENARIOS), default="main")
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--cwd", help="working directory for the started server (data files)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--clicks", type=int, default=20, help="NEXT clicks or guesses per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None:
+        proc, url = start_server(args.app, args.workers, args.threads, args.cwd)
+    try:
+        summary = run(url, args.app, args.sessions, args.concurrency, args.clicks, args.seed)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
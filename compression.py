@@ -0,0 +1,157 @@
+"""Response compression for the Dash apps, with a cache of compressed bodies.
+
+install_compression(app) compresses the text responses of the Flask server
+behind a Dash app (callback results, layout, geometry bundles, scripts) with
+brotli, if the optional `brotli` package is installed and the client accepts
+it, or else gzip. Compressed bodies are kept in a bounded LRU keyed by a
+digest of the uncompressed body, so a response that repeats byte for byte (a
+learning map, a quiz map, a geometry bundle) is compressed at most twice: a
+body is cached on the second sighting of its digest, so the one-off
+responses of callbacks that carry session state do not evict the others.
+
+Settings:
+
+    COMPRESS                 "0" to turn compression off (default on)
+    COMPRESS_MIN_SIZE        smallest body in bytes worth compressing (default 1024)
+    COMPRESS_LEVEL           gzip level 1-9 (default 6)
+    COMPRESS_BROTLI_QUALITY  brotli quality 0-11 (default 5)
+    COMPRESS_CACHE_BYTES     total size of the cached compressed bodies
+                             (default 32 MiB, 0 disables the cache)
+
+Cache counters are served at /_compression-cache.
+"""
+import gzip
+import hashlib
+import os
+
+from flask import g, jsonify, request
+
+from lru import LRUCache
+
+try:
+    import brotli  # optional dependency, gzip is used without it
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/css",
+    "text/html",
+    "text/plain",
+}
+
+# Digests remembered from their first sighting until a second one admits
+# the body to the cache
+SEEN_DIGESTS = 16384
+
+
+class CompressedBodyCache(LRUCache):
+    """Compressed bodies by (digest, encoding), bounded by their total size.
+
+    A body is only admitted on the second sighting of its digest: callback
+    responses that carry per-session state almost never repeat, and caching
+    them would evict the bodies that do. The digests seen once are kept in a
+    smaller LRU of their own.
+    """
+
+    def __init__(self, maxbytes, seen_entries=SEEN_DIGESTS):
+        super().__init__(maxbytes, weigh=len)
+        self._seen = LRUCache(seen_entries)
+        self.first_sightings = 0
+
+    def admit(self, key, value):
+        """Cache `value` if `key` was offered before, else remember the key"""
+        if self.maxsize <= 0:
+            return
+        if self._seen.pop(key) is not None:
+            self.put(key, value)
+        else:
+            self._seen.put(key, True)
+            self.first_sightings += 1
+
+    def stats(self):
+        stats = super().stats()
+        return {
+            "entries": stats["entries"],
+            "bytes": stats["size"],
+            "maxbytes": stats["maxsize"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_ratio": stats["hit_ratio"],
+            "first_sightings": self.first_sightings,
+        }
+
+
+def accepted_encodings(header):
+    """Encodings an Accept-Encoding header allows (q > 0), lower case"""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def install_compression(app):
+    """Compress the responses of a Dash app's server; returns the body cache,
+    or None when COMPRESS=0"""
+    if os.environ.get("COMPRESS", "1") == "0":
+        return None
+    min_size = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+    gzip_level = int(os.environ.get("COMPRESS_LEVEL", "6"))
+    brotli_quality = int(os.environ.get("COMPRESS_BROTLI_QUALITY", "5"))
+    cache = CompressedBodyCache(int(os.environ.get("COMPRESS_CACHE_BYTES", str(32 * 1024 * 1024))))
+    server = app.server
+
+    def compress(body, encoding):
+        if encoding == "br":
+            return brotli.compress(body, quality=brotli_quality)
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+    @server.after_request
+    def compress_response(response):
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.status_code != 200
+                or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers):
+            return response
+        response.vary.add("Accept-Encoding")
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        encoding = "br" if brotli is not None and "br" in accepted else "gzip" if "gzip" in accepted else None
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        # After-request hooks installed before this one run after it and
+        # would only see the compressed bytes (see profiling.py)
+        g.uncompressed_body = body
+
+        key = (hashlib.sha1(body).digest(), encoding)
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            cache.admit(key, compressed)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        # The compressed body is another representation of the same
+        # resource: keep validators working, but only as weak ones
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    @server.route("/_compression-cache")
+    def compression_cache_stats():
+        return jsonify(cache.stats())
+
+    return cache
@@ -1,89 +1,56 @@
-import json
-import random
+import os
 import time
-import pandas as pd
+from functools import lru_cache
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
-from dash import Dash, dcc, html, Input, Output, State, callback_context, no_update
+from dash import Dash, dcc, html, Input, Output, State, ClientsideFunction, Patch, callback_context, no_update
 import dash_bootstrap_components as dbc
 
-###############################################################################
-# 1) LOAD DATA
-###############################################################################
-with open("meere_meeresteile_und_seen.json", "r", encoding="utf-8") as f:
-    meere_data = json.load(f)
-with open("fluesse.json", "r", encoding="utf-8") as f:
-    fluesse_data = json.load(f)
-with open("inseln_inselgruppen.json", "r", encoding="utf-8") as f:
-    inseln_data = json.load(f)
-with open("gebirge.json", "r", encoding="utf-8") as f:
-    gebirge_data = json.load(f)
-
-# Already existing "forgotten.json"
-with open("forgotten.json", "r", encoding="utf-8") as f:
-    forgotten_data = json.load(f)
-
-# NEW: Load forgotten2.json
-with open("forgotten2.json", "r", encoding="utf-8") as f:
-    forgotten2_data = json.load(f)
-
-territory_data = {
-    "gewässer": {
-        "meere_meeresteile_und_seen": meere_data,
-        "fluesse": fluesse_data,
-        "inseln_inselgruppen": inseln_data,
-        "gebirge": gebirge_data,
-        "forgotten": forgotten_data,
-        "forgotten2": forgotten2_data
-    }
-}
+from geometry import QUANTIZE_PIXEL_FRACTION, decimals_for_zoom
+from middleware import install_middleware
+from readiness import install_readiness
+from session_store import new_session_id, session_store_from_env
+from shuffle import new_seed, shuffled
+from topic_registry import load_topic_registry
 
 ###############################################################################
-# 2) BUILD DATAFRAME
+# 1) TOPIC REGISTRY
 ###############################################################################
-data_rows = []
-
-def add_category(cat_name, cat_data):
-    feats = cat_data.get("data", [])
-    coords = cat_data.get("coords", {})
-    for feat in feats:
-        info = coords.get(feat, {})
-        geom_type = info.get("type", "point")
-        points = info.get("points", [])
-        data_rows.append({
-            "category": cat_name,
-            "feature": feat,
-            "geometry_type": geom_type,
-            "geometry_points": points
-        })
-
-# Add each group
-add_category("Meere, Meeresteile und Seen", territory_data["gewässer"]["meere_meeresteile_und_seen"])
-add_category("Flüsse", territory_data["gewässer"]["fluesse"])
-add_category("Inseln/Inselgruppen", territory_data["gewässer"]["inseln_inselgruppen"])
-add_category("Gebirge", territory_data["gewässer"]["gebirge"])
-add_category("Vergessenes", territory_data["gewässer"]["forgotten"])
-
-# NEW: Extra category for forgotten2.json
-add_category("Vergessenes2", territory_data["gewässer"]["forgotten2"])
-
-df = pd.DataFrame(data_rows)
+# The categories and their files are declared in topics.json. A file is only
+# parsed when its category is first used (see topic_registry.py); a missing
+# or broken file disables its category instead of stopping the app.
+#
+# The maps show the whole world (about mapbox zoom 1), so coordinates are
+# rounded to a fraction of a pixel there (QUANTIZE_PIXEL_FRACTION=0: unrounded)
+WORLD_MAP_ZOOM = 1
+QUANTIZE_FRACTION = float(os.environ.get("QUANTIZE_PIXEL_FRACTION", str(QUANTIZE_PIXEL_FRACTION)))
+topics = load_topic_registry(
+    base_dir=os.environ.get("TOPIC_DIR", ""),
+    decimals=decimals_for_zoom(WORLD_MAP_ZOOM, QUANTIZE_FRACTION) if QUANTIZE_FRACTION > 0 else None
+)
+ALL_CATEGORY = topics.all_category
+
+# TOPIC_PRELOAD=1 parses every file at import, e.g. so gunicorn's preloading
+# master shares the parsed topics with its workers
+if os.environ.get("TOPIC_PRELOAD", "0") == "1":
+    topics.preload()
 
 ###############################################################################
-# 3) DASH APP LAYOUT
+# 2) DASH APP LAYOUT
 ###############################################################################
 app = Dash(__name__, external_stylesheets=[dbc.themes.LUX])
+# WSGI entry point, e.g. `gunicorn example:server` (see gunicorn.conf.py)
+server = app.server
+# Profiling, /metrics and compression (see middleware.py)
+install_middleware(app)
 
 app.layout = dbc.Container([
     dcc.Store(id="store-mode", data=None),
     dcc.Store(id="store-selected-category", data=None),
-    dcc.Store(id="store-remaining-features", data=[]),
     dcc.Store(id="store-selected-feature", data=None),
-    dcc.Store(id="store-correct-count", data=0),
-    dcc.Store(id="store-wrong-count", data=0),
-    dcc.Store(id="store-done-features", data=[]),
-    dcc.Store(id="store-start-time", data=None),
+    dcc.Store(id="store-session-id", data=None),
 
     dbc.NavbarSimple(
         brand="Geographisches Ratespiel - Blind Map",
@@ -136,8 +103,32 @@ app.layout = dbc.Container([
                     ], md=8)
                 ]),
                 html.Hr(),
-                html.Div(id="score-display", className="mt-3 text-center"),
-                html.Div(id="lists-display", className="mt-3 text-center"),
+                # Score and lists are static; quiz_logic only updates the values inside
+                html.Div(
+                    dbc.Card(
+                        dbc.CardBody([
+                            html.H5("Aktueller Punktestand", className="card-title"),
+                            html.P(["Korrekt: ", html.Span(id="score-correct")], style={"margin": 0}),
+                            html.P(["Falsch: ", html.Span(id="score-wrong")], style={"margin": 0}),
+                            html.P(["Zeit: ", html.Span(id="score-time")],
+                                   style={"margin": 0, "marginTop": 8, "fontStyle": "italic"})
+                        ]),
+                        className="border p-2 d-inline-block"
+                    ),
+                    id="score-display", className="mt-3 text-center"
+                ),
+                html.Div(
+                    dbc.Card(
+                        dbc.CardBody([
+                            html.H6("Verbleibende Features:"),
+                            html.P(id="remaining-list", className="feature-list", **{"data-empty": "Keine mehr"}),
+                            html.H6("Bereits gemacht:"),
+                            html.P(id="done-list", className="feature-list", **{"data-empty": "Noch keine"})
+                        ]),
+                        className="border p-2 mt-2"
+                    ),
+                    id="lists-display", className="mt-3 text-center"
+                ),
                 dbc.Button("Neu starten", id="reset-button", n_clicks=0, color="warning", className="mt-3"),
                 dbc.Button("Zurück zum Menü", id="back-button", n_clicks=0, color="info", className="mt-3")
             ])
@@ -162,55 +153,39 @@ app.layout = dbc.Container([
 ], fluid=True)
 
 ###############################################################################
-# 4) SINGLE CALLBACK FOR MODE
+# 3) SINGLE CALLBACK FOR MODE
 ###############################################################################
-@app.callback(
+# Pure function of the button clicks, so it runs in the browser
+# (assets/clientside.js) instead of costing a server round trip.
+app.clientside_callback(
+    ClientsideFunction(namespace="example", function_name="set_mode"),
     Output("store-mode", "data"),
     Input("mode-learning-button", "n_clicks"),
     Input("mode-quiz-button", "n_clicks")
 )
-def set_mode(n_learn, n_quiz):
-    ctx = callback_context
-    if not ctx.triggered:
-        return no_update
-    trig_id = ctx.triggered[0]["prop_id"].split(".")[0]
-    if trig_id == "mode-learning-button" and n_learn:
-        return "learning"
-    elif trig_id == "mode-quiz-button" and n_quiz:
-        return "quiz"
-    return no_update
 
 ###############################################################################
-# 5) POPULATE CATEGORY DROPDOWN
+# 4) POPULATE CATEGORY DROPDOWN
 ###############################################################################
 @app.callback(
     Output("category-dropdown", "options"),
     Input("store-mode", "data")
 )
 def populate_category(mode):
-    if mode == "quiz":
-        return [
-            {"label": "Alle", "value": "Alle"},
-            {"label": "Meere, Meeresteile und Seen", "value": "Meere, Meeresteile und Seen"},
-            {"label": "Flüsse", "value": "Flüsse"},
-            {"label": "Inseln/Inselgruppen", "value": "Inseln/Inselgruppen"},
-            {"label": "Gebirge", "value": "Gebirge"},
-            {"label": "Vergessenes", "value": "Vergessenes"},
-            {"label": "Vergessenes2", "value": "Vergessenes2"},
-        ]
-    elif mode == "learning":
-        return [
-            {"label": "Meere, Meeresteile und Seen", "value": "Meere, Meeresteile und Seen"},
-            {"label": "Flüsse", "value": "Flüsse"},
-            {"label": "Inseln/Inselgruppen", "value": "Inseln/Inselgruppen"},
-            {"label": "Gebirge", "value": "Gebirge"},
-            {"label": "Vergessenes", "value": "Vergessenes"},
-            {"label": "Vergessenes2", "value": "Vergessenes2"},
-        ]
-    return []
+    if mode not in ["quiz", "learning"]:
+        return []
+    return category_options(tuple(topics.categories()), mode == "quiz")
+
+@lru_cache(maxsize=16)
+def category_options(categories, with_all):
+    """Dropdown options for the available categories; only rebuilt when a
+    topic file fails to load and its category drops out"""
+    if with_all and categories:
+        categories = (ALL_CATEGORY,) + categories
+    return [{"label": cat, "value": cat} for cat in categories]
 
 ###############################################################################
-# 6) SINGLE CALLBACK TO SET/RESET CATEGORY
+# 5) SINGLE CALLBACK TO SET/RESET CATEGORY
 ###############################################################################
 @app.callback(
     Output("store-selected-category", "data"),
@@ -238,9 +213,10 @@ def set_or_reset_category(n_next, n_quiz_back, n_learn_back, chosen_cat, old_cat
     return no_update
 
 ###############################################################################
-# 7) SWITCH SCREENS
+# 6) SWITCH SCREENS
 ###############################################################################
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace="example", function_name="switch_screens"),
     Output("mode-selection-card", "style"),
     Output("category-selection-card", "style"),
     Output("quiz-card", "style"),
@@ -248,166 +224,186 @@ def set_or_reset_category(n_next, n_quiz_back, n_learn_back, chosen_cat, old_cat
     Input("store-mode", "data"),
     Input("store-selected-category", "data")
 )
-def switch_screens(mode, selected_cat):
-    if mode is None:
-        return (
-            {"maxWidth": "600px", "margin": "0 auto 2rem auto", "display": "block"},
-            {"display": "none"},
-            {"display": "none"},
-            {"display": "none"}
-        )
-    if selected_cat is None:
-        return (
-            {"display": "none"},
-            {"maxWidth": "600px", "margin": "0 auto 2rem auto", "display": "block"},
-            {"display": "none"},
-            {"display": "none"}
-        )
-    if mode == "quiz":
-        return (
-            {"display": "none"},
-            {"display": "none"},
-            {"maxWidth": "900px", "margin": "0 auto 2rem auto", "display": "block"},
-            {"display": "none"}
-        )
-    elif mode == "learning":
-        return (
-            {"display": "none"},
-            {"display": "none"},
-            {"display": "none"},
-            {"maxWidth": "900px", "margin": "0 auto 2rem auto", "display": "block"}
-        )
-    return no_update, no_update, no_update, no_update
 
 ###############################################################################
-# 8) QUIZ LOGIC
+# 7) QUIZ LOGIC
 ###############################################################################
+# Quiz progress lives in a server-side session store (see session_store.py);
+# the browser only keeps the session id. The full lists are rendered when a
+# quiz starts or ends; a guess sends partial updates (Patch) for one feature.
+quiz_sessions = session_store_from_env()
+
+@lru_cache(maxsize=1024)
+def quiz_order(selected_cat, seed):
+    """The distinct features of a category in the order the quiz asks them"""
+    if selected_cat is None or seed is None:
+        return ()
+    topic = topics.get(selected_cat)
+    return tuple(shuffled(topic.distinct, seed)) if topic else ()
+
+def format_elapsed(start_time, now):
+    elapsed = now - start_time if start_time else 0
+    return f"{int(elapsed)} s" if elapsed < 120 else f"{int(elapsed//60)} min {int(elapsed%60)} s"
+
+def render_quiz_lists(selected_cat, order, position):
+    """Full dropdown options, remaining spans and done spans for a quiz position.
+
+    Every feature of the category keeps a span in the remaining list; guessed
+    ones get the "done" class, which hides them (assets/style.css). A guess
+    then only has to restyle one span by its index in the topic's ranks.
+    """
+    done = set(order[:position])
+    topic = topics.get(selected_cat)
+    distinct = topic.distinct if topic else ()
+    dropdown_options = [{"label": f, "value": f} for f in distinct if f not in done]
+    if len(done) == len(distinct):
+        remaining_spans = []
+    else:
+        remaining_spans = [html.Span(f, className="done" if f in done else None) for f in distinct]
+    done_spans = [html.Span(f) for f in order[:position]]
+    return dropdown_options, remaining_spans, done_spans
+
 @app.callback(
     Output("feature-guess-dropdown", "options"),
     Output("store-selected-feature", "data"),
     Output("guess-result", "children"),
-    Output("store-correct-count", "data"),
-    Output("store-wrong-count", "data"),
-    Output("store-done-features", "data"),
-    Output("store-remaining-features", "data"),
-    Output("score-display", "children"),
-    Output("lists-display", "children"),
+    Output("score-correct", "children"),
+    Output("score-wrong", "children"),
+    Output("score-time", "children"),
+    Output("remaining-list", "children"),
+    Output("done-list", "children"),
     Output("feature-guess-dropdown", "value"),
-    Output("store-start-time", "data"),
+    Output("store-session-id", "data"),
     Input("store-selected-category", "data"),
     Input("reset-button", "n_clicks"),
     Input("guess-button", "n_clicks"),
-    State("store-selected-feature", "data"),
-    State("store-correct-count", "data"),
-    State("store-wrong-count", "data"),
-    State("store-done-features", "data"),
-    State("store-remaining-features", "data"),
     State("feature-guess-dropdown", "value"),
-    State("store-start-time", "data")
+    State("store-session-id", "data"),
+    State("store-selected-feature", "data")
 )
 def quiz_logic(selected_cat,
                reset_click,
                guess_click,
-               current_feature,
-               correct_count,
-               wrong_count,
-               done_features,
-               remaining_features,
                user_guess,
-               start_time):
+               session_id,
+               asked_feature):
     ctx = callback_context
     if not ctx.triggered:
-        return no_update, no_update, "", no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update
+        return no_update, no_update, "", no_update, no_update, no_update, no_update, no_update, no_update, no_update
     now = time.time()
     trig_id = ctx.triggered[0]["prop_id"].split(".")[0]
     message = ""
 
     # If no category set, do nothing special
     if selected_cat is None:
-        return no_update, no_update, "", correct_count, wrong_count, done_features, remaining_features, no_update, no_update, no_update, start_time
+        return no_update, no_update, "", no_update, no_update, no_update, no_update, no_update, no_update, no_update
+
+    new_session = session_id is None
+    if new_session:
+        session_id = new_session_id()
+    outcome = {}
+
+    def play(session):
+        """The session state after this trigger, or None to leave it as is.
+
+        Runs inside quiz_sessions.update(), so concurrent requests of one
+        session take turns; it may run more than once (see session_store.py).
+        """
+        outcome.clear()
+        order = quiz_order(selected_cat, session["seed"]) if session else ()
+        asking = order[session["position"]] if session and session["position"] < len(order) else None
+        if (trig_id == "guess-button" and session is not None and session["category"] == selected_cat
+                and asking != asked_feature):
+            # The browser asked about another feature: a guess that was
+            # submitted twice, or arrived after a newer one. Counted once.
+            outcome["kind"] = "stale"
+            return None
+
+        # Reset scenario (also for a new category, a finished quiz or an expired session)
+        if (session is None or session["category"] != selected_cat or session["position"] >= len(order)
+                or trig_id in ["reset-button", "store-selected-category"]):
+            if trig_id == "reset-button":
+                outcome["message"] = "Ratespiel neu gestartet!"
+            elif trig_id == "guess-button" and session is None:
+                outcome["message"] = "Sitzung abgelaufen, Ratespiel neu gestartet."
+            outcome["kind"] = "reset"
+            return {"category": selected_cat, "seed": new_seed(), "position": 0,
+                    "correct": 0, "wrong": 0, "start_time": now}
+
+        if not user_guess:
+            outcome["kind"] = "no-guess"
+            return None
+
+        session = dict(session)
+        outcome.update(kind="guess", current_feature=asking, correct=user_guess == asking)
+        session["correct" if outcome["correct"] else "wrong"] += 1
+        session["position"] += 1
+        return session
+
+    session = quiz_sessions.update(session_id, play)
+
+    if outcome["kind"] == "stale":
+        return no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update
+
+    if outcome["kind"] == "reset":
+        order = quiz_order(selected_cat, session["seed"])
+        dropdown_options, remaining_spans, done_spans = render_quiz_lists(selected_cat, order, 0)
+        return (
+            dropdown_options,
+            order[0] if order else None,
+            outcome.get("message", ""),
+            0,
+            0,
+            format_elapsed(now, now),
+            remaining_spans,
+            done_spans,
+            None,
+            session_id if new_session else no_update
+        )
 
-    # If "Alle" => gather all features
-    if selected_cat == "Alle":
-        cat_feats = df["feature"].tolist()
-    else:
-        cat_feats = df[df["category"] == selected_cat]["feature"].tolist()
-
-    # Reset scenario
-    if not remaining_features or trig_id == "reset-button":
-        remaining_features = cat_feats.copy()
-        current_feature = random.choice(remaining_features) if remaining_features else None
-        done_features = []
-        correct_count = 0
-        wrong_count = 0
-        start_time = now
-        if trig_id == "reset-button":
-            message = "Ratespiel neu gestartet!"
-
-    # Guess scenario
-    elif trig_id == "guess-button":
-        if not current_feature:
-            message = "Keine Features übrig oder Ratespiel nicht gestartet."
-        else:
-            if not user_guess:
-                message = "Bitte wähle ein Feature aus dem Dropdown!"
-            else:
-                if start_time is None:
-                    start_time = now
-                if user_guess == current_feature:
-                    message = "Richtig! Neues Feature wird geladen."
-                    correct_count += 1
-                else:
-                    message = f"Falsch! Richtig war: {current_feature}"
-                    wrong_count += 1
-                if current_feature not in done_features:
-                    done_features.append(current_feature)
-                remaining_features = [f for f in remaining_features if f != current_feature]
-                if remaining_features:
-                    current_feature = random.choice(remaining_features)
-                else:
-                    message += " Ratespiel beendet!"
-                    current_feature = None
-
-    dropdown_options = [{"label": f, "value": f} for f in remaining_features]
-    elapsed = now - start_time if start_time else 0
-    elapsed_str = f"{int(elapsed)} s" if elapsed < 120 else f"{int(elapsed//60)} min {int(elapsed%60)} s"
-
-    score_display = dbc.Card(
-        dbc.CardBody([
-            html.H5("Aktueller Punktestand", className="card-title"),
-            html.P(f"Korrekt: {correct_count}", style={"margin": 0}),
-            html.P(f"Falsch: {wrong_count}", style={"margin": 0}),
-            html.P(f"Zeit: {elapsed_str}", style={"margin": 0, "marginTop": 8, "fontStyle": "italic"})
-        ]),
-        className="border p-2 d-inline-block"
-    )
+    if outcome["kind"] == "no-guess":
+        return (no_update, no_update, "Bitte wähle ein Feature aus dem Dropdown!", no_update, no_update,
+                format_elapsed(session["start_time"], now), no_update, no_update, None, no_update)
 
-    lists_display = dbc.Card(
-        dbc.CardBody([
-            html.H6("Verbleibende Features:"),
-            html.P(", ".join(remaining_features) if remaining_features else "Keine mehr"),
-            html.H6("Bereits gemacht:"),
-            html.P(", ".join(done_features) if done_features else "Noch keine")
-        ]),
-        className="border p-2 mt-2"
-    )
+    # Guess scenario: only the changed counter and the guessed feature's
+    # entries are sent, as partial updates of the lists
+    current_feature = outcome["current_feature"]
+    correct = outcome["correct"]
+    if correct:
+        message = "Richtig! Neues Feature wird geladen."
+    else:
+        message = f"Falsch! Richtig war: {current_feature}"
+    order = quiz_order(selected_cat, session["seed"])
+    position = session["position"]
+
+    if position < len(order):
+        next_feature = order[position]
+        dropdown_options = Patch()
+        dropdown_options.remove({"label": current_feature, "value": current_feature})
+        remaining_spans = Patch()
+        remaining_spans[topics.get(selected_cat).ranks[current_feature]]["props"]["className"] = "done"
+        done_spans = Patch()
+        done_spans.append(html.Span(current_feature))
+    else:
+        message += " Ratespiel beendet!"
+        next_feature = None
+        dropdown_options, remaining_spans, done_spans = render_quiz_lists(selected_cat, order, position)
 
     return (
         dropdown_options,
-        current_feature,
+        next_feature,
         message,
-        correct_count,
-        wrong_count,
-        done_features,
-        remaining_features,
-        score_display,
-        lists_display,
+        session["correct"] if correct else no_update,
+        no_update if correct else session["wrong"],
+        format_elapsed(session["start_time"], now),
+        remaining_spans,
+        done_spans,
         None,
-        start_time
+        session_id if new_session else no_update
     )
 
 ###############################################################################
-# 9) QUIZ MAP (NO-FILL FOR POLYGONS)
+# 8) QUIZ MAP (NO-FILL FOR POLYGONS)
 ###############################################################################
 @app.callback(
     Output("blind-map", "figure"),
@@ -423,12 +419,12 @@ def update_quiz_map(selected_feature):
     if not selected_feature:
         return fig
 
-    row = df[df["feature"] == selected_feature]
-    if row.empty:
+    record = topics.feature(selected_feature)
+    if record is None:
         return fig
 
-    geom_type = row.iloc[0]["geometry_type"]
-    points = row.iloc[0]["geometry_points"]
+    geom_type = record.geometry_type
+    points = record.geometry_points
 
     # color for quiz
     color_quiz = "red"
@@ -442,21 +438,16 @@ def update_quiz_map(selected_feature):
             marker=dict(size=12, color=color_quiz)
         ))
     elif geom_type == "line":
-        lats = [p[0] for p in points]
-        lons = [p[1] for p in points]
         fig.add_trace(go.Scattergeo(
-            lat=lats,
-            lon=lons,
+            lat=points[:, 0],
+            lon=points[:, 1],
             mode="lines",
             line=dict(width=6, color=color_quiz)
         ))
     elif geom_type == "polygon":
-        lats = [p[0] for p in points]
-        lons = [p[1] for p in points]
-        # close polygon if not closed
-        if points[0] != points[-1]:
-            lats.append(points[0][0])
-            lons.append(points[0][1])
+        # polygons were closed when the geometry was packed
+        lats = points[:, 0]
+        lons = points[:, 1]
 
         # Outline only
         fig.add_trace(go.Scattergeo(
@@ -480,8 +471,22 @@ def update_quiz_map(selected_feature):
     return fig
 
 ###############################################################################
-# 10) LEARNING MAP (NO-FILL FOR POLYGONS)
+# 9) LEARNING MAP (NO-FILL FOR POLYGONS)
 ###############################################################################
+def join_with_gaps(arrays):
+    """Stack (n, 2) point arrays into one, with a NaN row between them.
+
+    Plotly does not connect points across a NaN gap, so one line trace can
+    draw many separate lines.
+    """
+    gap = np.full((1, 2), np.nan)
+    parts = []
+    for pts in arrays:
+        if parts:
+            parts.append(gap)
+        parts.append(pts)
+    return np.concatenate(parts)
+
 @app.callback(
     Output("learning-map", "figure"),
     Output("learning-list", "children"),
@@ -493,7 +498,8 @@ def update_learning_map(selected_category):
         fig.update_layout(height=400)
         return fig, "Bitte Kategorie auswählen."
 
-    sub_df = df[df["category"] == selected_category]
+    topic = topics.get(selected_category)
+    records = topic.records if topic else ()
     fig = go.Figure()
     fig.update_layout(
         title=f"Lernmodus: {selected_category}",
@@ -503,80 +509,102 @@ def update_learning_map(selected_category):
 
     color_learn = "blue"
 
-    for _, row_data in sub_df.iterrows():
-        feat = row_data["feature"]
-        gtype = row_data["geometry_type"]
-        pts = row_data["geometry_points"]
-
-        if gtype == "point":
-            lat, lon = pts[0]
-            fig.add_trace(go.Scattergeo(
-                lat=[lat],
-                lon=[lon],
-                mode="markers+text",
-                text=[feat],
-                textposition="top center",
-                marker=dict(size=12, color=color_learn)
-            ))
-        elif gtype == "line":
-            lats = [p[0] for p in pts]
-            lons = [p[1] for p in pts]
-            fig.add_trace(go.Scattergeo(
-                lat=lats,
-                lon=lons,
-                mode="lines",
-                line=dict(width=4, color=color_learn)
-            ))
-            # Label near midpoint
-            mid_i = len(lats)//2
-            fig.add_trace(go.Scattergeo(
-                lat=[lats[mid_i]],
-                lon=[lons[mid_i]],
-                mode="text",
-                text=[feat],
-                textposition="top center"
-            ))
-        elif gtype == "polygon":
-            lats = [p[0] for p in pts]
-            lons = [p[1] for p in pts]
-            if pts[0] != pts[-1]:
-                lats.append(pts[0][0])
-                lons.append(pts[0][1])
-
-            # Outline only:
-            fig.add_trace(go.Scattergeo(
-                lat=lats,
-                lon=lons,
-                mode="lines",
-                line=dict(width=3, color=color_learn)
-            ))
-            # Optionally fill:
-            # fig.add_trace(go.Scattergeo(
-            #     lat=lats,
-            #     lon=lons,
-            #     mode="lines",
-            #     fill="toself",
-            #     line=dict(width=3, color=color_learn),
-            #     fillcolor=color_learn,
-            #     opacity=0.3
-            # ))
-
-            # Label near centroid
-            avg_lat = sum(lats)/len(lats)
-            avg_lon = sum(lons)/len(lons)
-            fig.add_trace(go.Scattergeo(
-                lat=[avg_lat],
-                lon=[avg_lon],
-                mode="text",
-                text=[feat],
-                textposition="top center"
-            ))
-
-    list_text = "Features: " + ", ".join(sub_df["feature"].tolist())
+    # One trace per geometry type instead of one per feature: lines and
+    # polygon outlines are joined with NaN gaps, names go into one text trace
+    by_type = {"point": [], "line": [], "polygon": []}
+    for record in records:
+        if record.geometry_type in by_type and len(record.geometry_points):
+            by_type[record.geometry_type].append(record)
+
+    if by_type["point"]:
+        pts = np.array([record.geometry_points[0] for record in by_type["point"]])
+        fig.add_trace(go.Scattergeo(
+            lat=pts[:, 0],
+            lon=pts[:, 1],
+            mode="markers+text",
+            text=[record.feature for record in by_type["point"]],
+            textposition="top center",
+            marker=dict(size=12, color=color_learn),
+            name="Punkte"
+        ))
+
+    label_feats = []
+    label_pts = []
+    for gtype, width in [("line", 4), ("polygon", 3)]:
+        if not by_type[gtype]:
+            continue
+        # polygons were closed when the geometry was packed
+        pts = join_with_gaps([record.geometry_points for record in by_type[gtype]])
+        fig.add_trace(go.Scattergeo(
+            lat=pts[:, 0],
+            lon=pts[:, 1],
+            mode="lines",
+            line=dict(width=width, color=color_learn),
+            name="Linien" if gtype == "line" else "Flächen"
+        ))
+        for record in by_type[gtype]:
+            label_feats.append(record.feature)
+            if gtype == "line":
+                # Label near midpoint
+                label_pts.append(record.geometry_points[len(record.geometry_points)//2])
+            else:
+                # Label near centroid
+                label_pts.append(record.geometry_points.mean(axis=0))
+
+    if label_pts:
+        label_pts = np.array(label_pts)
+        fig.add_trace(go.Scattergeo(
+            lat=label_pts[:, 0],
+            lon=label_pts[:, 1],
+            mode="text",
+            text=label_feats,
+            textposition="top center",
+            name="Namen"
+        ))
+
+    list_text = "Features: " + ", ".join(topic.features if topic else ())
     return fig, list_text
 
+###############################################################################
+# 10) WARM-UP AND READINESS
+###############################################################################
+def warm_up():
+    """Exercise the cold paths once before traffic arrives (see readiness.py).
+
+    Draws the empty learning map (plotly express), and the quiz and learning
+    maps for one feature of every geometry type, loading topic files in order
+    until all types are found. Then renders the layout and dependencies Dash
+    serves on page load.
+    """
+    update_learning_map(None)
+    missing = {"point", "line", "polygon"}
+    for category in topics.categories():
+        topic = topics.get(category)
+        if topic is None:
+            continue
+        found = [r for r in topic.index.values() if r.geometry_type in missing and len(r.geometry_points)]
+        for record in found:
+            if record.geometry_type in missing:
+                missing.discard(record.geometry_type)
+                update_quiz_map(record.feature)
+        if found:
+            update_learning_map(category)
+        if not missing:
+            break
+    client = server.test_client()
+    for path in ["/", "/_dash-layout", "/_dash-dependencies"]:
+        client.get(path)
+
+# /readyz answers 200 once warm_up() has run (WARMUP selects when)
+install_readiness(app, warm_up)
+
 ###############################################################################
 # RUN
 ###############################################################################
 if __name__ == "__main__":
-    app.run_server(debug=True, host="0.0.0.0", port=8080)
+    # Development server only; production runs `gunicorn example:server`
+    app.run(
+        debug=os.environ.get("DASH_DEBUG", "0") == "1",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", "8080"))
+    )
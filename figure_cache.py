@@ -0,0 +1,21 @@
+"""Bounded LRU cache for serialized plotly figures."""
+from lru import LRUCache
+
+
+class FigureCache(LRUCache):
+    """Thread-safe LRU mapping of cache keys to figure dicts.
+
+    Values are the plotly JSON dicts returned by `go.Figure.to_dict()`, which
+    Dash can send to the browser as-is. Callers must treat them as read-only.
+    """
+
+    def __init__(self, maxsize=256):
+        super().__init__(maxsize)
+
+    def get_or_build(self, key, build):
+        """Cached value for `key`, calling `build()` and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.put(key, value)
+        return value
@@ -0,0 +1,239 @@
+"""Geometry helpers shared by the geometry store and the map callbacks."""
+import math
+
+import numpy as np
+
+# Douglas-Peucker tolerances (in degrees) of the precomputed levels of detail.
+# Level 0 is the full-resolution geometry from geo.json.
+LOD_TOLERANCES = (0.0, 0.04, 0.08, 0.16)
+
+# A simplified level is used while its tolerance stays below this fraction of
+# a screen pixel at the map's zoom level (outlines are drawn 2 px wide).
+LOD_PIXEL_FRACTION = 1.0
+
+# Mapbox renders the whole world on a 512 px tile at zoom 0
+TILE_SIZE = 512
+
+# Coordinates sent to the browser are rounded to steps of at most this
+# fraction of a screen pixel at the zoom level they are first shown at
+QUANTIZE_PIXEL_FRACTION = 0.25
+
+
+class RingSet:
+    """The polygons of one feature, packed into contiguous NumPy arrays.
+
+    coords           (n, 2) float64 array of [x, y] pairs; every ring is closed
+    ring_offsets     (r + 1,) ints, ring i is coords[ring_offsets[i]:ring_offsets[i + 1]]
+    polygon_offsets  (p + 1,) ints, polygon j is rings polygon_offsets[j]:polygon_offsets[j + 1],
+                     outer ring first, then its holes
+
+    `coords` may be a read-only view into a larger buffer (e.g. the mmap of
+    geometry.bin), so RingSets are never modified in place.
+    """
+
+    __slots__ = ("coords", "ring_offsets", "polygon_offsets")
+
+    def __init__(self, coords, ring_offsets, polygon_offsets):
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.polygon_offsets = polygon_offsets
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 2)), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+    @classmethod
+    def from_polygons(cls, polygons):
+        """Pack a list of polygons (lists of [x, y] rings), closing open rings"""
+        rings = []
+        polygon_sizes = []
+        for polygon in polygons:
+            polygon_rings = [close_ring(np.asarray(ring, dtype=np.float64).reshape(-1, 2))
+                             for ring in polygon if len(ring)]
+            if polygon_rings:
+                rings.extend(polygon_rings)
+                polygon_sizes.append(len(polygon_rings))
+        if not rings:
+            return cls.empty()
+        ring_offsets = np.concatenate([[0], np.cumsum([len(ring) for ring in rings])])
+        polygon_offsets = np.concatenate([[0], np.cumsum(polygon_sizes)])
+        return cls(np.concatenate(rings), ring_offsets, polygon_offsets)
+
+    @classmethod
+    def from_layout(cls, coords, layout):
+        """View on `coords` given ring lengths grouped per polygon ([[n, ...], ...])"""
+        ring_lengths = [n for polygon in layout for n in polygon]
+        ring_offsets = np.concatenate([[0], np.cumsum(ring_lengths, dtype=np.int64)])
+        polygon_offsets = np.concatenate([[0], np.cumsum([len(polygon) for polygon in layout], dtype=np.int64)])
+        return cls(coords[:ring_offsets[-1]], ring_offsets, polygon_offsets)
+
+    def __bool__(self):
+        return len(self.coords) > 0
+
+    def layout(self):
+        """Ring lengths grouped per polygon, the inverse of from_layout()"""
+        ring_lengths = np.diff(self.ring_offsets).tolist()
+        return [ring_lengths[a:b] for a, b in zip(self.polygon_offsets[:-1], self.polygon_offsets[1:])]
+
+    def rings(self):
+        return [self.coords[a:b] for a, b in zip(self.ring_offsets[:-1], self.ring_offsets[1:])]
+
+    def polygons(self):
+        rings = self.rings()
+        return [rings[a:b] for a, b in zip(self.polygon_offsets[:-1], self.polygon_offsets[1:])]
+
+    def to_coordinates(self):
+        """Nested lists in GeoJSON MultiPolygon layout"""
+        return [[ring.tolist() for ring in polygon] for polygon in self.polygons()]
+
+    def bbox(self):
+        """[min_x, min_y, max_x, max_y], or None if there is no geometry"""
+        if not self:
+            return None
+        return self.coords.min(axis=0).tolist() + self.coords.max(axis=0).tolist()
+
+    def centroid(self):
+        """Area-weighted centroid with holes subtracted, as [x, y].
+
+        Degenerate geometry (zero area) falls back to the vertex mean; an
+        empty RingSet gives None.
+        """
+        if not self:
+            return None
+        coords = self.coords
+        (x0, y0), (x1, y1) = coords[:-1].T, coords[1:].T
+        cross = x0 * y1 - x1 * y0
+        # The step from one ring's last vertex to the next ring's first is no edge
+        cross[self.ring_offsets[1:-1] - 1] = 0.0
+        n_rings = len(self.ring_offsets) - 1
+        segment_ring = np.repeat(np.arange(n_rings), np.diff(self.ring_offsets))[:-1]
+        area = np.bincount(segment_ring, cross, minlength=n_rings) / 2.0
+        moment_x = np.bincount(segment_ring, (x0 + x1) * cross, minlength=n_rings) / 6.0
+        moment_y = np.bincount(segment_ring, (y0 + y1) * cross, minlength=n_rings) / 6.0
+        # Outer rings add area, holes remove it, whatever their winding
+        outer = np.zeros(n_rings, dtype=bool)
+        outer[self.polygon_offsets[:-1]] = True
+        sign = np.where((area >= 0) == outer, 1.0, -1.0)
+        total_area = (sign * area).sum()
+        if not total_area:
+            return coords.mean(axis=0).tolist()
+        return [float((sign * moment_x).sum() / total_area), float((sign * moment_y).sum() / total_area)]
+
+    def quantized(self, decimals):
+        """Copy with coordinates rounded to `decimals` places (see decimals_for_zoom)"""
+        return RingSet(np.round(self.coords, decimals), self.ring_offsets, self.polygon_offsets)
+
+    def delta_encode(self, decimals):
+        """Compact integer encoding of quantized(decimals) for the browser.
+
+        Returns {"decimals", "layout", "deltas"}: `layout` as in layout(),
+        `deltas` the flattened coordinates times 10**decimals as integers,
+        each ring's first vertex absolute and every further vertex as the
+        difference to its predecessor. assets/clientside.js decodes it.
+        """
+        ints = np.rint(self.coords * 10.0 ** decimals).astype(np.int64)
+        deltas = ints.copy()
+        deltas[1:] -= ints[:-1]
+        starts = self.ring_offsets[:-1]
+        deltas[starts] = ints[starts]
+        return {"decimals": decimals, "layout": self.layout(), "deltas": deltas.ravel().tolist()}
+
+    def simplify(self, tolerance):
+        """Douglas-Peucker simplified copy, dropping rings that collapse.
+
+        A polygon whose outer ring collapses is dropped together with its holes.
+        """
+        if tolerance <= 0:
+            return self
+        polygons = []
+        for polygon in self.polygons():
+            rings = [simplify_ring(ring, tolerance) for ring in polygon]
+            if rings[0] is None:
+                continue
+            polygons.append([ring for ring in rings if ring is not None])
+        return RingSet.from_polygons(polygons)
+
+
+def close_ring(ring):
+    """Return the (n, 2) ring with its first point repeated at the end if needed"""
+    if len(ring) and not np.array_equal(ring[0], ring[-1]):
+        return np.vstack([ring, ring[:1]])
+    return ring
+
+
+def _segment_distances(points, a, b):
+    """Distances from each of `points` to segment a-b (planar, in degrees)"""
+    d = b - a
+    length_sq = d @ d
+    if length_sq == 0:
+        return np.hypot(*(points - a).T)
+    t = np.clip((points - a) @ d / length_sq, 0.0, 1.0)
+    return np.hypot(*(points - a - t[:, None] * d).T)
+
+
+def _simplify_chain(points, tolerance):
+    """Douglas-Peucker on an open chain, keeping both end points"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dist = _segment_distances(points[first + 1:last], points[first], points[last])
+        i = int(dist.argmax())
+        if dist[i] > tolerance:
+            index = first + 1 + i
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return points[keep]
+
+
+def simplify_ring(ring, tolerance):
+    """Douglas-Peucker simplification of a closed (n, 2) ring.
+
+    The ring is split at the vertex farthest from its start so both halves
+    are simplified as open chains. Returns None if the ring collapses to
+    fewer than three distinct vertices.
+    """
+    if tolerance <= 0:
+        return ring
+    if len(ring) < 4:
+        return None
+    split = 1 + int(((ring[1:-1] - ring[0]) ** 2).sum(axis=1).argmax())
+    head = _simplify_chain(ring[:split + 1], tolerance)
+    tail = _simplify_chain(ring[split:], tolerance)
+    simplified = np.vstack([head, tail[1:]])
+    if len(simplified) < 4:
+        return None
+    return simplified
+
+
+def build_lods(ring_set):
+    """RingSets for every level in LOD_TOLERANCES.
+
+    A level that would lose every polygon repeats the previous level, so a
+    tiny country stays visible at all zoom levels.
+    """
+    lods = [ring_set]
+    for tolerance in LOD_TOLERANCES[1:]:
+        level = ring_set.simplify(tolerance)
+        lods.append(level if level else lods[-1])
+    return lods
+
+
+def decimals_for_zoom(zoom, pixel_fraction=QUANTIZE_PIXEL_FRACTION):
+    """Decimal places of degrees that keep rounding below `pixel_fraction` px at a mapbox zoom"""
+    step = 360.0 / (TILE_SIZE * 2 ** zoom) * pixel_fraction
+    return max(0, math.ceil(-math.log10(step)))
+
+
+def lod_for_zoom(zoom):
+    """Index of the coarsest level that deviates by at most LOD_PIXEL_FRACTION px at a mapbox zoom"""
+    degrees_per_pixel = 360.0 / (TILE_SIZE * 2 ** zoom)
+    level = 0
+    for i, tolerance in enumerate(LOD_TOLERANCES):
+        if tolerance <= degrees_per_pixel * LOD_PIXEL_FRACTION:
+            level = i
+    return level
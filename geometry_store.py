@@ -0,0 +1,247 @@
+"""Precompiled geometry store for main.py.
+
+geo.json and the region files declared in regions.json are compiled offline
+into one binary artifact (geometry.bin) so that worker processes can mmap the
+coordinates instead of parsing ~300 KB of JSON at import time:
+
+    python geometry_store.py
+
+Geometry is handed out as geometry.RingSet views into that mapping, so the
+coordinate pages are shared between workers and never copied into Python
+lists.
+
+Layout of geometry.bin:
+
+    header   magic (4s), format version (uint32), index length (uint32)
+    index    UTF-8 JSON: source digest, region lists, per-feature name, ring
+             layout for every level of detail (see geometry.LOD_TOLERANCES),
+             area-weighted centroid and bounding box
+    padding  up to the next multiple of 8 bytes
+    coords   packed little-endian float64 [lon, lat] pairs (GeoJSON order)
+
+The artifact records a digest of its source files. load_geometry() compares
+it against the files on disk and falls back to parsing the JSON sources when
+the artifact is missing, was written by another format version or is stale.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from geometry import LOD_TOLERANCES, RingSet, build_lods
+from region_registry import REGISTRY_SOURCE, load_region_registry
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STORE_PATH = os.path.join(BASE_DIR, "geometry.bin")
+STORE_MAGIC = b"GQGS"
+STORE_VERSION = 5
+
+GEOJSON_SOURCE = "geo.json"
+# Region source files, as declared in regions.json (see region_registry.py)
+REGION_SOURCES = load_region_registry().sources
+
+_HEADER = struct.Struct("<4sII")
+_COORD_DTYPE = np.dtype("<f8")
+
+
+def _source_paths():
+    names = [GEOJSON_SOURCE, REGISTRY_SOURCE] + sorted(REGION_SOURCES.values())
+    return [os.path.join(BASE_DIR, name) for name in names]
+
+
+def source_digest():
+    """SHA-1 over the names and contents of all source files"""
+    digest = hashlib.sha1()
+    for path in _source_paths():
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _read_json(name):
+    with open(os.path.join(BASE_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ring_set(geometry):
+    """Pack a GeoJSON Polygon/MultiPolygon geometry into a RingSet"""
+    geo_type = geometry.get("type", "").lower()
+    if geo_type == "polygon":
+        return RingSet.from_polygons([geometry["coordinates"]])
+    if geo_type == "multipolygon":
+        return RingSet.from_polygons(geometry["coordinates"])
+    return RingSet.empty()
+
+
+def _properties(ring_set):
+    """Static per-feature values computed once at build or load time"""
+    return {"centroid": ring_set.centroid(), "bbox": ring_set.bbox()}
+
+
+###############################################################################
+# BUILD
+###############################################################################
+def build_store(path=STORE_PATH):
+    """Compile geo.json and the region files into the binary artifact at `path`"""
+    geojson_data = _read_json(GEOJSON_SOURCE)
+    regions = {key: _read_json(name) for key, name in REGION_SOURCES.items()}
+
+    chunks = []
+    n_points = 0
+    features = {}
+    for feature in geojson_data["features"]:
+        # Keep the first feature per id, like the JSON lookup in main.py does
+        code = feature.get("id")
+        if code is None or code in features or "geometry" not in feature:
+            continue
+        ring_set = _ring_set(feature["geometry"])
+        levels = []
+        for level in build_lods(ring_set):
+            levels.append({"offset": n_points, "rings": level.layout()})
+            chunks.append(level.coords)
+            n_points += len(level.coords)
+        features[code] = {"name": feature.get("properties", {}).get("name"),
+                          "type": feature["geometry"]["type"], "levels": levels, **_properties(ring_set)}
+
+    index = json.dumps({
+        "digest": source_digest(),
+        "lod_tolerances": list(LOD_TOLERANCES),
+        "regions": regions,
+        "features": features,
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    coords = np.concatenate(chunks).astype(_COORD_DTYPE) if chunks else np.empty((0, 2), _COORD_DTYPE)
+    header = _HEADER.pack(STORE_MAGIC, STORE_VERSION, len(index))
+    padding = -(len(header) + len(index)) % 8
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(index)
+        f.write(b"\0" * padding)
+        f.write(coords.tobytes())
+    os.replace(tmp_path, path)
+    return len(features), n_points
+
+
+###############################################################################
+# LOAD
+###############################################################################
+class GeometryStore:
+    """Read-only view on a compiled geometry.bin.
+
+    All coordinates live in one (n, 2) float64 array backed by the memory
+    mapping; rings() only builds the small offset arrays for a feature.
+    """
+
+    def __init__(self, buf, index, data_start):
+        self._buf = buf
+        self._coords = np.frombuffer(buf, dtype=_COORD_DTYPE, offset=data_start).reshape(-1, 2)
+        self._features = index["features"]
+        self.regions = index["regions"]
+        self.version = f"{STORE_VERSION}-{index['digest'][:12]}"
+
+    def __contains__(self, code):
+        return code in self._features
+
+    def names(self):
+        """Feature id -> name (from the GeoJSON properties) for every feature"""
+        return {code: entry["name"] for code, entry in self._features.items()}
+
+    def rings(self, code, level=0):
+        """RingSet ([lon, lat] pairs) for a feature id at a level of detail, or None"""
+        entry = self._features.get(code)
+        if entry is None:
+            return None
+        layout = entry["levels"][level]
+        return RingSet.from_layout(self._coords[layout["offset"]:], layout["rings"])
+
+    def properties(self, code):
+        """Precomputed {"centroid": [lon, lat], "bbox": [lon0, lat0, lon1, lat1]}, or None"""
+        entry = self._features.get(code)
+        if entry is None:
+            return None
+        return {"centroid": entry["centroid"], "bbox": entry["bbox"]}
+
+
+class JsonGeometrySource:
+    """Fallback with the GeometryStore interface, built from the JSON sources"""
+
+    def __init__(self):
+        geojson_data = _read_json(GEOJSON_SOURCE)
+        self.regions = {key: _read_json(name) for key, name in REGION_SOURCES.items()}
+        self.version = f"{STORE_VERSION}-{source_digest()[:12]}"
+        self._features = {}
+        self._lods = {}
+        for feature in geojson_data["features"]:
+            if "id" in feature and feature["id"] not in self._features:
+                self._features[feature["id"]] = feature
+
+    def __contains__(self, code):
+        return code in self._features
+
+    def names(self):
+        return {code: feature.get("properties", {}).get("name") for code, feature in self._features.items()}
+
+    def rings(self, code, level=0):
+        feature = self._features.get(code)
+        if feature is None or "geometry" not in feature:
+            return None
+        if code not in self._lods:
+            self._lods[code] = build_lods(_ring_set(feature["geometry"]))
+        return self._lods[code][level]
+
+    def properties(self, code):
+        ring_set = self.rings(code)
+        if ring_set is None:
+            return None
+        return _properties(ring_set)
+
+
+def load_store(path=STORE_PATH):
+    """Memory-map the compiled store; None if it is missing, foreign or stale"""
+    try:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buf) < _HEADER.size:
+        return None
+    magic, version, index_len = _HEADER.unpack_from(buf, 0)
+    if magic != STORE_MAGIC or version != STORE_VERSION:
+        return None
+    index_end = _HEADER.size + index_len
+    try:
+        index = json.loads(buf[_HEADER.size:index_end].decode("utf-8"))
+    except ValueError:
+        return None
+    if index.get("digest") != source_digest():
+        return None
+    if index.get("lod_tolerances") != list(LOD_TOLERANCES):
+        return None
+
+    data_start = index_end + (-index_end % 8)
+    return GeometryStore(buf, index, data_start)
+
+
+def load_geometry():
+    """Compiled store if it is current, otherwise the parsed JSON sources"""
+    store = load_store()
+    if store is not None:
+        return store
+    logger.warning("%s is missing or stale, parsing JSON sources "
+                   "(run `python geometry_store.py` to rebuild)", os.path.basename(STORE_PATH))
+    return JsonGeometrySource()
+
+
+if __name__ == "__main__":
+    n_features, n_points = build_store()
+    print(f"Wrote {STORE_PATH}: {n_features} features, {n_points} points")
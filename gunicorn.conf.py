@@ -0,0 +1,67 @@
+"""Gunicorn settings for serving the Dash apps, e.g. `gunicorn main:server`.
+
+All values can be overridden through the environment:
+
+    PORT                  port to bind (default 8080)
+    WEB_CONCURRENCY       worker processes (default 2 * CPUs + 1)
+    GUNICORN_THREADS      threads per worker (default 4)
+    GUNICORN_TIMEOUT      worker timeout in seconds (default 30)
+    GUNICORN_PRELOAD      "0" to import the app in every worker instead of once
+    SESSION_BACKEND       session store of example.py (default sqlite with several
+                          workers, see session_store.py)
+    METRICS_DIR           directory where the workers share their /metrics numbers
+                          (default with several workers: a fresh directory per
+                          server in the temp directory, see metrics.py)
+    WARMUP                when the apps warm up before reporting ready at /readyz
+                          (default: at import, i.e. once in the master; see readiness.py)
+"""
+import gc
+import glob
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+keepalive = 5
+
+# Server-side sessions must be visible to every worker; the in-process
+# memory backend is only safe with a single worker
+if workers > 1:
+    os.environ.setdefault("SESSION_BACKEND", "sqlite")
+
+# Likewise /metrics: each worker writes its numbers to METRICS_DIR and the
+# one answering a scrape sums them. The default directory belongs to this
+# master (the config is read there) and is removed when it exits.
+_default_metrics_dir = os.path.join(tempfile.gettempdir(), f"guess_country_metrics-{os.getpid()}")
+if workers > 1:
+    os.environ.setdefault("METRICS_DIR", _default_metrics_dir)
+
+# Import the app (geometry store, indexes, warm-up) once in the master
+# so forked workers share those pages copy-on-write.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+
+def on_starting(server):
+    # Snapshots of an earlier run would be added to this one's counters
+    metrics_dir = os.environ.get("METRICS_DIR")
+    if metrics_dir:
+        # Only the snapshot files (metrics.SNAPSHOT_PATTERN), never other
+        # files of a shared directory
+        for path in glob.glob(os.path.join(metrics_dir, "metrics-*.json")):
+            os.remove(path)
+
+
+def on_exit(server):
+    if os.environ.get("METRICS_DIR") == _default_metrics_dir:
+        shutil.rmtree(_default_metrics_dir, ignore_errors=True)
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's generations, so
+    # gc passes in the workers do not touch (and thereby copy) shared pages
+    gc.freeze()
@@ -0,0 +1,95 @@
+"""Thread-safe bounded LRU mapping shared by the caches and stores.
+
+LRUCache backs the figure cache (figure_cache.py), the compressed body cache
+(compression.py) and the in-process session store (session_store.py). Its
+bound is on the total weight of the entries: by default every entry weighs
+1, so `maxsize` is a number of entries; with `weigh=len` it is a number of
+bytes.
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded mapping that evicts its least recently used entries first.
+
+    get() counts a hit or miss and makes the entry the most recent one;
+    peek() does neither. None is not a storable value.
+    """
+
+    def __init__(self, maxsize, weigh=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._weigh = weigh or (lambda value: 1)
+        self._size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def put(self, key, value):
+        """Store `value` as the most recent entry; values heavier than the
+        whole cache are not stored"""
+        weight = self._weigh(value)
+        if weight > self.maxsize:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= self._weigh(old)
+            self._data[key] = value
+            self._size += weight
+            while self._size > self.maxsize:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= self._weigh(evicted)
+
+    def pop(self, key):
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                self._size -= self._weigh(value)
+            return value
+
+    def oldest(self):
+        """(key, value) of the least recently used entry, or None"""
+        with self._lock:
+            return next(iter(self._data.items()), None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "size": self._size,
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,147 +1,46 @@
 import json
-import random
-import pandas as pd
+import logging
+import os
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
 import plotly.graph_objects as go
+from plotly.utils import PlotlyJSONEncoder
 
-from dash import Dash, dcc, html, Input, Output, State, callback_context, no_update
+from flask import Response, abort, jsonify, request
+from dash import Dash, dcc, html, Input, Output, State, ClientsideFunction, callback_context, no_update
 import dash_bootstrap_components as dbc
 
+from figure_cache import FigureCache
+from geometry import LOD_TOLERANCES, QUANTIZE_PIXEL_FRACTION, RingSet, decimals_for_zoom, lod_for_zoom
+from geometry_store import load_geometry
+from middleware import install_middleware
+from name_resolver import NameResolver
+from readiness import install_readiness
+from region_registry import category_options, load_region_registry, region_countries
+from shuffle import new_seed, shuffled
+
+logger = logging.getLogger(__name__)
+
 ###############################################################################
 # 1) LOAD DATA
 ###############################################################################
-# Fix file paths to match actual files
-with open("europe.json", "r", encoding="utf-8") as f:
-    europe_data_raw = json.load(f)
-with open("asia_oceania.json", "r", encoding="utf-8") as f:
-    asia_oceania_data_raw = json.load(f)
-with open("africa.json", "r", encoding="utf-8") as f:
-    africa_data_raw = json.load(f)
-with open("north_america.json", "r", encoding="utf-8") as f:
-    north_america_data_raw = json.load(f)
-with open("south_america.json", "r", encoding="utf-8") as f:
-    south_america_data_raw = json.load(f)
-    
-# Load GeoJSON data for country shapes
-with open("geo.json", "r", encoding="utf-8") as f:
-    geojson_data = json.load(f)
-
-# Create country name mappings (German to English and vice versa)
-# This is a simplified mapping, expand as needed
-COUNTRY_MAP = {
-    "Italien": "Italy",
-    "Deutschland": "Germany",
-    "Spanien": "Spain",
-    "Frankreich": "France",
-    "Portugal": "Portugal",
-    "Belgien": "Belgium",
-    "Niederlande": "Netherlands",
-    "Vereinigtes Königreich": "United Kingdom",
-    "Grossbritannien": "United Kingdom",
-    "Irland": "Ireland",
-    "Island": "Iceland",
-    "Norwegen": "Norway",
-    "Schweden": "Sweden",
-    "Finnland": "Finland",
-    "Dänemark": "Denmark",
-    "Schweiz": "Switzerland",
-    "Italien": "Italy",
-    "Österreich": "Austria",
-    "Ungarn": "Hungary",
-    "Tschechien": "Czech Republic",
-    "Slowakei": "Slovakia",
-    "Polen": "Poland",
-    "Russland (Teil)": "Russia",
-    "Belarus": "Belarus",
-    "Ukraine": "Ukraine",
-    "Moldova": "Moldova",
-    "Rumänien": "Romania",
-    "Bulgarien": "Bulgaria",
-    "Türkei (Teil)": "Turkey",
-    "Slowenien": "Slovenia",
-    "Kroatien": "Croatia",
-    "Bosnien-Herzegowina": "Bosnia and Herzegovina",
-    "Serbien": "Serbia",
-    "Nordmazedonien": "North Macedonia",
-    "Montenegro": "Montenegro",
-    "Kosovo": "Kosovo",  # may require feature-id "XKX"
-    "Albanien": "Albania",
-    "Griechenland": "Greece",
-    "Malta": "Malta",
-    "Andorra": "Andorra",
-    "Monaco": "Monaco",
-    "Liechtenstein": "Liechtenstein",
-    "Vatikanstadt": "Vatican City",
-    "San Marino": "San Marino",
-    "Luxemburg": "Luxembourg",
-    "Estland": "Estonia",
-    "Lettland": "Latvia",
-    "Litauen": "Lithuania",
-    # Add more mappings as needed
-}
-
-COUNTRY_MAP.update({
-    "Äthiopien": "Ethiopia",
-    "Tunesien": "Tunisia",
-    "Syrien": "Syria",
-    "Bangladesch": "Bangladesh",
-    "Pakistan": "Pakistan",
-    "Madagaskar": "Madagascar",
-    "Mali": "Mali",
-    "Südafrika": "South Africa",
-    "Brasilien": "Brazil",
-    "Kolumbien": "Colombia",
-    "Argentinien": "Argentina",
-    "Bolivien": "Bolivia",
-    "Irak": "Iraq",
-    "Ägypten": "Egypt",
-    "Peru": "Peru",
-    "Iran": "Iran",
-    "Afghanistan": "Afghanistan",
-    "Korea": "South Korea"
-})
-
-COUNTRY_MAP.update({
-    # ...existing entries...
-    "Australien": "Australia",
-    "Neuseeland": "New Zealand",
-    "Kanada": "Canada",
-    "USA": "United States",
-    "Vereinigte Staaten": "United States",
-    "Mexiko": "Mexico"
-})
-
-COUNTRY_MAP.update({
-    # ...existing entries...
-    "Venezuela": "Venezuela",
-    "Ecuador": "Ecuador",
-    "Chile": "Chile",
-    "Ghana": "Ghana",
-    "Kongo": "Democratic Republic of the Congo",
-    "Somalia": "Somalia",
-    "Eritrea": "Eritrea"
-})
-
-COUNTRY_MAP.update({
-    "Kuba": "Cuba",
-    "Jamaika": "Jamaica",
-    "Namibia": "Namibia",
-    "Libyen": "Libya",
-    "Marokko": "Morocco",
-    "Nigeria": "Nigeria",
-    "Kenia": "Kenya",
-    "Algerien": "Algeria",
-    "Indonesien": "Indonesia",
-    "China": "China",
-    "Thailand": "Thailand",
-    "Philippinen": "Philippines",
-    "Indien": "India",
-    "Japan": "Japan",
-    "Malaysia": "Malaysia",
-    "Saudi-Arabien": "Saudi Arabia"
-})
+# Regions are declared in regions.json (see region_registry.py). Their
+# country lists and the country shapes come from the compiled geometry store
+# (geometry.bin, built by `python geometry_store.py`). If the artifact is
+# missing or stale, load_geometry() falls back to parsing the JSON files.
+region_registry = load_region_registry()
+geometry_store = load_geometry()
+DATA_VERSION = geometry_store.version
+
+# Country name tables (German -> English, English -> ISO3 code, misspellings),
+# declared in country_names.json next to regions.json (see region_registry.py)
+COUNTRY_MAP = region_registry.names.english
+COUNTRY_TO_CODE = region_registry.names.codes
+NAME_ALIASES = region_registry.names.aliases
 
 # Define European microstates
-# Names as they appear in df['country'] (likely German from your JSONs)
+# Names as they appear in the region files (German)
 EUROPEAN_MICROSTATES_DF_KEYS = ["Andorra", "Monaco", "Liechtenstein", "Vatikanstadt", "San Marino", "Kosovo", "Malta"]
 # Corresponding English names for checking against the 'eng_name' variable
 EUROPEAN_MICROSTATES_ENGLISH_CHECK = ["Andorra", "Monaco", "Liechtenstein", "Vatican City", "San Marino", "Kosovo", "Malta"]
@@ -149,162 +48,70 @@ EUROPEAN_MICROSTATES_ENGLISH_CHECK = ["Andorra", "Monaco", "Liechtenstein", "Vat
 # Create a reverse lookup from English to German
 REVERSE_COUNTRY_MAP = {v: k for k, v in COUNTRY_MAP.items()}
 
-# Create mapping from country code to GeoJSON feature
-country_code_to_feature = {}
-for feature in geojson_data['features']:
-    if 'id' in feature and feature['id'] not in country_code_to_feature:
-        country_code_to_feature[feature['id']] = feature
-
-# Additional mapping from country name to country code
-COUNTRY_TO_CODE = {
-    "Italy": "ITA",
-    "Germany": "DEU",
-    "Spain": "ESP",
-    "France": "FRA",
-    "Portugal": "PRT",
-    "Switzerland": "CHE",
-    "Austria": "AUT",
-    "Belgium": "BEL",
-    "Netherlands": "NLD",
-    "United Kingdom": "GBR",
-    "Ireland": "IRL",
-    "Australia": "AUS",
-    "New Zealand": "NZL",
-    # Add more as needed
-}
-
-COUNTRY_TO_CODE.update({
-    "Iceland": "ISL",
-    "Norway": "NOR",
-    "Sweden": "SWE",
-    "Finland": "FIN",
-    "Denmark": "DNK",
-    "Luxembourg": "LUX",
-    "Russia": "RUS",
-    "Belarus": "BLR",
-    "Ukraine": "UKR",
-    "Moldova": "MDA",
-    "Romania": "ROU",
-    "Bulgaria": "BGR",
-    "Turkey": "TUR",
-    "Slovenia": "SVN",
-    "Croatia": "HRV",
-    "Bosnia and Herzegovina": "BIH",
-    "Serbia": "SRB",
-    "North Macedonia": "MKD",
-    "Montenegro": "MNE",
-    "Kosovo": "XKX",            # check your geo.json feature id
-    "Albania": "ALB",
-    "Greece": "GRC",
-    "Malta": "MLT",
-    "Andorra": "AND",
-    "Monaco": "MCO",
-    "Liechtenstein": "LIE",
-    "Vatican City": "VAT",
-    "San Marino": "SMR",
-    "Poland": "POL",
-    "Lithuania": "LTU",
-    "Latvia": "LVA",
-    "Estonia": "EST",
-    "Czech Republic": "CZE",
-    "Slovakia": "SVK",
-    "Hungary": "HUN",
-})
-
-COUNTRY_TO_CODE.update({
-    "Ethiopia": "ETH",
-    "Tunisia": "TUN",
-    "Syria": "SYR",
-    "Bangladesh": "BGD",
-    "Pakistan": "PAK",
-    "Madagascar": "MDG",
-    "Mali": "MLI",
-    "South Africa": "ZAF",
-    "Brazil": "BRA",
-    "Colombia": "COL",
-    "Argentina": "ARG",
-    "Bolivia": "BOL",
-    "Iraq": "IRQ",
-    "Egypt": "EGY",
-    "Peru": "PER",
-    "Iran": "IRN",
-    "Afghanistan": "AFG",
-    "South Korea": "KOR"
-})
-
-COUNTRY_TO_CODE.update({
-    # ...existing entries...
-    "Canada": "CAN",
-    "United States": "USA",
-    "Mexico": "MEX"
-})
-
-COUNTRY_TO_CODE.update({
-    # ...existing entries...
-    "Venezuela": "VEN",
-    "Ecuador": "ECU",
-    "Chile": "CHL",
-    "Ghana": "GHA",
-    "Democratic Republic of the Congo": "COD",
-    "Somalia": "SOM",
-    "Eritrea": "ERI"
-})
-
-COUNTRY_TO_CODE.update({
-    "Cuba": "CUB",
-    "Jamaica": "JAM",
-    "Namibia": "NAM",
-    "Libya": "LBY",
-    "Morocco": "MAR",
-    "Nigeria": "NGA",
-    "Kenya": "KEN",
-    "Algeria": "DZA",
-    "Indonesia": "IDN",
-    "China": "CHN",
-    "Thailand": "THA",
-    "Philippines": "PHL",
-    "India": "IND",
-    "Japan": "JPN",
-    "Malaysia": "MYS",
-    "Saudi Arabia": "SAU"
-})
+# Every country of the region files resolved once to its English name and
+# geometry id (see name_resolver.py); requests only look names up
+name_resolver = NameResolver(
+    [country["country"] for countries in geometry_store.regions.values() for country in countries],
+    COUNTRY_MAP, COUNTRY_TO_CODE, geometry_store.names(), NAME_ALIASES
+)
+for country, (geometry_id, geometry_name, score) in name_resolver.matched.items():
+    # An exact name match is expected (e.g. Kosovo); anything less may be a neighbour
+    logger.log(logging.INFO if score == 1.0 else logging.WARNING,
+               "No geometry code for %s, matched by name to %s (%s, similarity %.2f)",
+               country, geometry_name, geometry_id, score)
+if name_resolver.unresolved:
+    logger.warning("No geometry found for %d countries, their maps stay empty: %s",
+                   len(name_resolver.unresolved), ", ".join(name_resolver.unresolved))
 
 def extract_country_coordinates(country_name):
-    """Extract coordinates for a country from GeoJSON data"""
-    # Try to map German name to English
-    english_name = COUNTRY_MAP.get(country_name, country_name)
-    
-    # Get country code
-    country_code = COUNTRY_TO_CODE.get(english_name)
-    
-    if not country_code or country_code not in country_code_to_feature:
-        # Return dummy coordinates if no match found
-        return {"type": "polygon", "points": [[0, 0]]}
-    
-    feature = country_code_to_feature[country_code]
-    
-    if 'geometry' not in feature:
-        return {"type": "polygon", "points": [[0, 0]]}
-    
-    geometry = feature['geometry']
-    geo_type = geometry['type'].lower()
-    
-    if geo_type == 'polygon':
-        # Extract first polygon's coordinates
-        coordinates = geometry['coordinates'][0]  # First polygon
-        # Convert [lon, lat] to [lat, lon] format
-        points = [[coord[1], coord[0]] for coord in coordinates]
-        return {"type": "polygon", "points": points}
+    """Extract coordinates for a country from GeoJSON data.
+
+    The geometry is returned as a RingSet of closed [lon, lat] rings
+    ("polygons", full resolution) and one RingSet per level of detail in
+    LOD_TOLERANCES ("lods", level 0 = full resolution), all views into the
+    geometry store's flat coordinate buffer. "centroid" ({"lat", "lon"},
+    area-weighted) and "bbox" ([lat0, lon0, lat1, lon1]) come precomputed
+    from the store. Unknown countries get empty RingSets and no centroid/bbox.
+    """
+    # Geometry id resolved at load
+    resolved = name_resolver.resolve(country_name)
+    country_code = resolved.geometry if resolved else None
+
+    no_match = {"type": "polygon", "polygons": RingSet.empty(),
+                "lods": [RingSet.empty() for _ in LOD_TOLERANCES],
+                "centroid": None, "bbox": None}
+    if not country_code or country_code not in geometry_store:
+        # No match found
+        return no_match
     
-    elif geo_type == 'multipolygon':
-        # Include all sub‐polygons (e.g. Australia mainland + Tasmania)
-        points = []
-        for polygon in geometry['coordinates']:
-            for ring in polygon:
-                points.extend([[coord[1], coord[0]] for coord in ring])
-        return {"type": "polygon", "points": points}
-    
-    return {"type": "polygon", "points": [[0, 0]]}
+    lods = [geometry_store.rings(country_code, level) for level in range(len(LOD_TOLERANCES))]
+    properties = geometry_store.properties(country_code)
+    if not lods[0] or not properties or properties["centroid"] is None:
+        return no_match
+    lon, lat = properties["centroid"]
+    lon0, lat0, lon1, lat1 = properties["bbox"]
+    return {"type": "polygon", "polygons": lods[0], "lods": lods,
+            "centroid": dict(lat=lat, lon=lon), "bbox": [lat0, lon0, lat1, lon1]}
+
+def polygon_map_view(bbox):
+    """Map center, zoom and level of detail framing a [lat0, lon0, lat1, lon1] bbox"""
+    lat0, lon0, lat1, lon1 = bbox
+    center_poly = dict(lat=(lat0 + lat1) / 2, lon=(lon0 + lon1) / 2)
+    span_poly = max(lat1 - lat0, lon1 - lon0, 0.1) # Avoid division by zero if span is tiny
+    zoom_poly = max(2, min(12, 4 / span_poly if span_poly > 0 else 2))
+    # The coarsest precomputed simplification that is invisible at this zoom
+    return center_poly, zoom_poly, lod_for_zoom(zoom_poly)
+
+def polygons_to_geojson(feature_id, ring_set):
+    """GeoJSON MultiPolygon feature for a [lon, lat] RingSet"""
+    return {
+        "type": "Feature",
+        "id": feature_id,
+        "geometry": {
+            "type": "MultiPolygon",
+            "coordinates": ring_set.to_coordinates()
+        }
+    }
 
 # Transform raw data into the expected format
 def transform_countries_data(countries_list):
@@ -320,28 +127,10 @@ def transform_countries_data(countries_list):
     
     return {"data": data, "coords": coords}
 
-europe_data = transform_countries_data(europe_data_raw)
-asia_data = transform_countries_data(asia_oceania_data_raw)
-africa_data = transform_countries_data(africa_data_raw)
-
-# Combine both North and South America into "americas_data"
-americas_data_raw = north_america_data_raw + south_america_data_raw
-americas_data = transform_countries_data(americas_data_raw)
-
-# For oceania, we'll extract the countries from asia_oceania that are part of Oceania
-# For now, let's just use Australia and New Zealand
-oceania_countries = ["Australien", "Neuseeland"]
-oceania_data_raw = [country for country in asia_oceania_data_raw if country["country"] in oceania_countries]
-oceania_data = transform_countries_data(oceania_data_raw)
-
+# Region name -> {"data": countries, "coords": ...}, in dropdown order
 countries_data = {
-    "regions": {
-        "europe": europe_data,
-        "asia": asia_data,
-        "africa": africa_data,
-        "americas": americas_data,
-        "oceania": oceania_data
-    }
+    region.name: transform_countries_data(region_countries(region, geometry_store.regions))
+    for region in region_registry.regions
 }
 
 ###############################################################################
@@ -349,41 +138,89 @@ countries_data = {
 ###############################################################################
 data_rows = []
 
+# Polygon coordinates go out rounded to a fraction of a screen pixel at the
+# country's zoom (QUANTIZE_PIXEL_FRACTION=0 sends them unrounded)
+QUANTIZE_FRACTION = float(os.environ.get("QUANTIZE_PIXEL_FRACTION", str(QUANTIZE_PIXEL_FRACTION)))
+
 def add_category(cat_name, cat_data):
     feats = cat_data.get("data", [])
     coords = cat_data.get("coords", {})
     for feat in feats:
         info = coords.get(feat, {})
         geom_type = info.get("type", "polygon")  # Countries are mostly polygons
-        points = info.get("points", [])
+        polygons = info.get("polygons", RingSet.empty())
+        lods = info.get("lods", [polygons])
+        # Static per-country view values, so the map callback only reads them
+        centroid = info.get("centroid")
+        bbox = info.get("bbox")
+        map_center, map_zoom, map_lod = polygon_map_view(bbox) if bbox else (None, None, 0)
+        map_decimals = decimals_for_zoom(map_zoom, QUANTIZE_FRACTION) if bbox and QUANTIZE_FRACTION > 0 else None
+        map_polygons = lods[map_lod] if map_decimals is None else lods[map_lod].quantized(map_decimals)
         data_rows.append({
             "category": cat_name,
             "country": feat,
             "geometry_type": geom_type,
-            "geometry_points": points
+            "geometry_polygons": polygons,
+            "geometry_lods": lods,
+            "centroid": centroid,
+            "map_center": map_center,
+            "map_zoom": map_zoom,
+            "map_lod": map_lod,
+            "map_polygons": map_polygons,
+            "map_decimals": map_decimals
         })
 
 # Add each region
-add_category("Europe", countries_data["regions"]["europe"])
-add_category("Asia", countries_data["regions"]["asia"])
-add_category("Africa", countries_data["regions"]["africa"])
-add_category("Americas", countries_data["regions"]["americas"])
-add_category("Oceania", countries_data["regions"]["oceania"])
+for region_name, region_data in countries_data.items():
+    add_category(region_name, region_data)
+
+# Immutable lookup indexes, built once at load so callbacks never scan the
+# rows: country -> record (first row wins) and category -> countries in load
+# order ("All" holds every row).
+ALL_CATEGORY = region_registry.all_category
+CountryRecord = namedtuple("CountryRecord", list(data_rows[0]))
 
-df = pd.DataFrame(data_rows)
+_country_index = {}
+_category_index = {ALL_CATEGORY: []}
+for data_row in data_rows:
+    _country_index.setdefault(data_row["country"], CountryRecord(**data_row))
+    _category_index.setdefault(data_row["category"], []).append(data_row["country"])
+    _category_index[ALL_CATEGORY].append(data_row["country"])
+
+COUNTRY_INDEX = MappingProxyType(_country_index)
+CATEGORY_INDEX = MappingProxyType({cat: tuple(countries) for cat, countries in _category_index.items()})
 
 ###############################################################################
 # 3) DASH APP LAYOUT
 ###############################################################################
 app = Dash(__name__, external_stylesheets=[dbc.themes.LUX])
+# WSGI entry point, e.g. `gunicorn main:server` (see gunicorn.conf.py)
+server = app.server
+# Profiling, /metrics and compression (see middleware.py)
+install_middleware(app)
+
+# CLIENTSIDE_MAPS=1 sends the map data of the chosen region to the browser
+# once (a versioned, cacheable bundle served at /_geometry/) and runs
+# NEXT/BACK navigation and map drawing as clientside callbacks.
+CLIENTSIDE_MAPS = os.environ.get("CLIENTSIDE_MAPS", "0") == "1"
+
+# Server-rendered maps are returned by the callbacks that change the current
+# country, so one click costs one round trip instead of a chain of them. With
+# CLIENTSIDE_MAPS the browser draws the maps and these outputs are dropped.
+MAP_OUTPUTS = [] if CLIENTSIDE_MAPS else [
+    Output("country-map", "figure", allow_duplicate=True),
+    Output("quiz-map", "figure", allow_duplicate=True),
+]
+NO_MAP_UPDATE = (no_update,) * len(MAP_OUTPUTS)
 
 app.layout = dbc.Container([
     dcc.Store(id="store-mode", data=None),
     dcc.Store(id="store-selected-category", data=None),
-    dcc.Store(id="store-countries-list", data=[]),
+    dcc.Store(id="store-shuffle-seed", data=None),
     dcc.Store(id="store-current-index", data=0),
     dcc.Store(id="store-current-country", data=None),
     dcc.Store(id="store-show-name", data=False),
+    dcc.Store(id="store-geometry-url", data=app.get_relative_path(f"/_geometry/{DATA_VERSION}/")),
 
     dbc.NavbarSimple(
         brand="Country Quiz App",
@@ -459,100 +296,86 @@ app.layout = dbc.Container([
 ###############################################################################
 # 4) CALLBACKS FOR MODE SELECTION
 ###############################################################################
-@app.callback(
+# Pure function of the button clicks, so it runs in the browser
+# (assets/clientside.js) instead of costing a server round trip.
+app.clientside_callback(
+    ClientsideFunction(namespace="main", function_name="set_mode"),
     Output("store-mode", "data"),
     Input("mode-learning-button", "n_clicks"),
     Input("mode-quiz-button", "n_clicks")
 )
-def set_mode(n_learn, n_quiz):
-    ctx = callback_context
-    if not ctx.triggered:
-        return no_update
-    trig_id = ctx.triggered[0]["prop_id"].split(".")[0]
-    if trig_id == "mode-learning-button" and n_learn:
-        return "learn"
-    elif trig_id == "mode-quiz-button" and n_quiz:
-        return "quiz"
-    return no_update
 
 ###############################################################################
 # 5) POPULATE CATEGORY DROPDOWN
 ###############################################################################
+# Built once from the region registry
+CATEGORY_OPTIONS = category_options(region_registry)
+
 @app.callback(
     Output("category-dropdown", "options"),
     Input("store-mode", "data")
 )
 def populate_category(mode):
     if mode in ["learn", "quiz"]:
-        return [
-            {"label": "All Regions", "value": "All"},
-            {"label": "Europe", "value": "Europe"},
-            {"label": "Asia", "value": "Asia"},
-            {"label": "Africa", "value": "Africa"},
-            {"label": "Americas", "value": "Americas"},
-            {"label": "Oceania", "value": "Oceania"},
-        ]
+        return CATEGORY_OPTIONS
     return []
 
 ###############################################################################
 # 6) SET CATEGORY AND INITIALIZE COUNTRY LIST
 ###############################################################################
+# The session stores hold the category, a shuffle seed and the current index;
+# the shuffled list is rebuilt from them (assets/clientside.js does the same),
+# so request and response sizes do not grow with the region.
+@lru_cache(maxsize=1024)
+def session_countries(category, seed):
+    """The countries of a category in the session's shuffled order"""
+    if category is None or seed is None:
+        return ()
+    return tuple(shuffled(CATEGORY_INDEX.get(category, ()), seed))
+
 @app.callback(
     Output("store-selected-category", "data"),
-    Output("store-countries-list", "data"),
+    Output("store-shuffle-seed", "data"),
     Output("store-current-index", "data"),
     Output("store-current-country", "data"),
+    *MAP_OUTPUTS,
     Input("category-next-button", "n_clicks"),
     Input("learn-return-button", "n_clicks"),
     Input("quiz-return-button", "n_clicks"),
     State("category-dropdown", "value"),
+    State("store-mode", "data"),
+    prevent_initial_call=True
 )
-def set_category_and_initialize(n_next, n_learn_return, n_quiz_return, chosen_cat):
+def set_category_and_initialize(n_next, n_learn_return, n_quiz_return, chosen_cat, mode):
     ctx = callback_context
     if not ctx.triggered:
-        return no_update, no_update, no_update, no_update
+        return (no_update, no_update, no_update, no_update) + NO_MAP_UPDATE
     trig_id = ctx.triggered[0]["prop_id"].split(".")[0]
     
     if trig_id in ["learn-return-button", "quiz-return-button"]:
-        # Reset everything when returning to menu
-        return None, [], 0, None
+        # Reset everything when returning to menu (the hidden maps keep their figure)
+        return (None, None, 0, None) + NO_MAP_UPDATE
     
     if trig_id == "category-next-button" and chosen_cat:
-        # Get countries for the selected category
-        if chosen_cat == "All":
-            countries = df["country"].tolist()
-        else:
-            countries = df[df["category"] == chosen_cat]["country"].tolist()
-        
-        # Randomize order for quiz/learn
-        random.shuffle(countries)
+        # Randomize order for quiz/learn; only the seed is stored
+        seed = new_seed()
+        countries = session_countries(chosen_cat, seed)
         
         # Set first country
         current_country = countries[0] if countries else None
         
-        return chosen_cat, countries, 0, current_country
+        return (chosen_cat, seed, 0, current_country) + map_updates(current_country, mode)
     
-    return no_update, no_update, no_update, no_update
+    return (no_update, no_update, no_update, no_update) + NO_MAP_UPDATE
 
 ###############################################################################
 # 7) NAVIGATION CALLBACKS (NEXT/BACK)
 ###############################################################################
-@app.callback(
-    Output("store-current-index", "data", allow_duplicate=True),
-    Output("store-current-country", "data", allow_duplicate=True),
-    Output("store-show-name", "data"),
-    Input("next-button", "n_clicks"),
-    Input("back-button", "n_clicks"),
-    Input("quiz-next-button", "n_clicks"),
-    Input("show-button", "n_clicks"),
-    State("store-current-index", "data"),
-    State("store-countries-list", "data"),
-    prevent_initial_call=True
-)
-def navigate_countries(n_next, n_back, n_quiz_next, n_show, current_idx, countries_list):
+def navigate_countries(n_next, n_back, n_quiz_next, n_show, current_idx, selected_cat, seed, mode):
     ctx = callback_context
+    countries_list = session_countries(selected_cat, seed)
     if not ctx.triggered or not countries_list:
-        return no_update, no_update, no_update
+        return (no_update, no_update, no_update) + NO_MAP_UPDATE
     
     trig_id = ctx.triggered[0]["prop_id"].split(".")[0]
     show_name = False
@@ -560,47 +383,61 @@ def navigate_countries(n_next, n_back, n_quiz_next, n_show, current_idx, countri
     if trig_id == "next-button" or trig_id == "quiz-next-button":
         new_idx = (current_idx + 1) % len(countries_list)
         new_country = countries_list[new_idx]
-        return new_idx, new_country, show_name
+        return (new_idx, new_country, show_name) + map_updates(new_country, mode)
     
     elif trig_id == "back-button":
         new_idx = (current_idx - 1) % len(countries_list)
         new_country = countries_list[new_idx]
-        return new_idx, new_country, show_name
+        return (new_idx, new_country, show_name) + map_updates(new_country, mode)
     
     elif trig_id == "show-button":
         show_name = True
-        return current_idx, countries_list[current_idx], show_name
+        return (current_idx, countries_list[current_idx], show_name) + NO_MAP_UPDATE
     
-    return no_update, no_update, no_update
+    return (no_update, no_update, no_update) + NO_MAP_UPDATE
+
+NAVIGATION_DEPENDENCIES = [
+    Output("store-current-index", "data", allow_duplicate=True),
+    Output("store-current-country", "data", allow_duplicate=True),
+    Output("store-show-name", "data"),
+    *MAP_OUTPUTS,
+    Input("next-button", "n_clicks"),
+    Input("back-button", "n_clicks"),
+    Input("quiz-next-button", "n_clicks"),
+    Input("show-button", "n_clicks"),
+    State("store-current-index", "data"),
+    State("store-selected-category", "data"),
+    State("store-shuffle-seed", "data"),
+    State("store-mode", "data"),
+]
+
+if CLIENTSIDE_MAPS:
+    app.clientside_callback(
+        ClientsideFunction(namespace="main", function_name="navigate_countries"),
+        *NAVIGATION_DEPENDENCIES,
+        State("store-geometry-url", "data"),
+        prevent_initial_call=True
+    )
+else:
+    app.callback(*NAVIGATION_DEPENDENCIES, prevent_initial_call=True)(navigate_countries)
 
 ###############################################################################
 # 8) DISPLAY COUNTRY NAME
 ###############################################################################
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace="main", function_name="display_country_name"),
     Output("country-name-display", "children"),
     Output("quiz-country-display", "children"),
     Input("store-current-country", "data"),
     Input("store-show-name", "data"),
     Input("store-mode", "data")
 )
-def display_country_name(current_country, show_name, mode):
-    if not current_country:
-        return "Select a region to start", ""
-    
-    if mode == "learn":
-        return current_country, ""
-    elif mode == "quiz":
-        if show_name:
-            return "", current_country
-        else:
-            return "", "?"
-    
-    return no_update, no_update
 
 ###############################################################################
 # 9) SWITCH SCREENS
 ###############################################################################
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace="main", function_name="switch_screens"),
     Output("mode-selection-card", "style"),
     Output("category-selection-card", "style"),
     Output("learn-card", "style"),
@@ -608,210 +445,282 @@ def display_country_name(current_country, show_name, mode):
     Input("store-mode", "data"),
     Input("store-selected-category", "data")
 )
-def switch_screens(mode, selected_cat):
-    if mode is None:
-        return (
-            {"maxWidth": "600px", "margin": "0 auto 2rem auto", "display": "block"},
-            {"display": "none"},
-            {"display": "none"},
-            {"display": "none"}
-        )
-    if selected_cat is None:
-        return (
-            {"display": "none"},
-            {"maxWidth": "600px", "margin": "0 auto 2rem auto", "display": "block"},
-            {"display": "none"},
-            {"display": "none"}
-        )
-    if mode == "learn":
-        return (
-            {"display": "none"},
-            {"display": "none"},
-            {"maxWidth": "900px", "margin": "0 auto 2rem auto", "display": "block"},
-            {"display": "none"}
-        )
-    elif mode == "quiz":
-        return (
-            {"display": "none"},
-            {"display": "none"},
-            {"display": "none"},
-            {"maxWidth": "900px", "margin": "0 auto 2rem auto", "display": "block"}
-        )
-    return no_update, no_update, no_update, no_update
 
 ###############################################################################
 # 10) MAP DISPLAY
 ###############################################################################
-@app.callback(
-    Output("country-map", "figure"),
-    Output("quiz-map", "figure"),
-    Input("store-current-country", "data"),
-    Input("store-mode", "data")
+# Figures depend only on (country, mode, data version), so rendered maps are
+# kept in a bounded LRU cache. FIGURE_CACHE_WARM=1 renders all of them at
+# startup; hit/miss counters are served at /_figure-cache.
+MAP_MODES = ["learn", "quiz"]
+figure_cache = FigureCache(maxsize=int(os.environ.get("FIGURE_CACHE_SIZE", "256")))
+FIGURE_CACHE_WARM = os.environ.get("FIGURE_CACHE_WARM", "0") == "1"
+
+# Centers and zooms of the marker views
+MICROSTATES_CENTER = dict(lat=47, lon=12) # Adjusted for better coverage including Malta
+MICROSTATES_ZOOM = 3.6
+DOT_ZOOM = 4
+MOSCOW = dict(lat=55.7558, lon=37.6173)
+
+# (name, centroid) of every European microstate with geometry, drawn together
+MICROSTATE_MARKERS = [
+    (key, COUNTRY_INDEX[key].centroid) for key in EUROPEAN_MICROSTATES_DF_KEYS
+    if key in COUNTRY_INDEX and COUNTRY_INDEX[key].centroid is not None
+]
+
+BASE_MAP_LAYOUT = dict(
+    mapbox_style="open-street-map",
+    mapbox_center=dict(lat=0, lon=0),
+    mapbox_zoom=1,
+    height=500,
+    margin={"l":0,"r":0,"t":30,"b":0}
 )
-def update_map(current_country_from_store, mode):
-    learn_fig = go.Figure()
-    quiz_fig  = go.Figure()
 
-    # Initial layout with explicit mapbox properties
-    learn_fig.update_layout(
-        mapbox_style="open-street-map",
-        mapbox_center=dict(lat=0, lon=0),
-        mapbox_zoom=1,
-        height=500,
-        margin={"l":0,"r":0,"t":30,"b":0}
-    )
-    quiz_fig.update_layout(
-        mapbox_style="open-street-map",
-        mapbox_center=dict(lat=0, lon=0),
-        mapbox_zoom=1,
-        height=500,
-        margin={"l":0,"r":0,"t":30,"b":0}
-    )
+def country_map_spec(current_country_from_store):
+    """What the map shows for a country in either mode, or None for an empty map.
 
-    # Set default titles
-    learn_fig.update_layout(title_text="Learn Mode")
-    quiz_fig.update_layout(title_text="Quiz Mode")
+    The spec is shared by the server-rendered figures and the clientside
+    geometry bundle, so both draw the same map:
 
+        {"kind": "microstates", "name", "center", "zoom"}   all MICROSTATE_MARKERS
+        {"kind": "dot", "name", "center", "zoom"}           one marker
+        {"kind": "polygon", "name", "center", "zoom", "polygons", "decimals", "learn_color"}
+
+    "decimals" is the number of decimal places the polygons were rounded
+    to, or None if they were not.
+    """
     if not current_country_from_store:
-        return learn_fig, quiz_fig
-
-    # Fix user-provided spelling (synonyms dictionary)
-    synonyms = {
-        "Andora": "Andorra",
-        "San MArino": "San Marino",
-        "Lichtenstein": "Liechtenstein",
-        "Vaitikan": "Vatican City",
-        "monaco": "Monaco",
-        "kosovo": "Kosovo",
-        "Monacco": "Monaco",
-        "Kossovo": "Kosovo"
-    }
-    
-    processed_country_name = current_country_from_store
-    if processed_country_name in synonyms:
-        processed_country_name = synonyms[processed_country_name]
+        return None
 
-    # Get English name for logic, and row for data
-    eng_name = COUNTRY_MAP.get(processed_country_name, processed_country_name)
-    
-    row = df[df["country"] == processed_country_name]
-    if row.empty:
-        # If country (after synonym processing) is not in DataFrame, return empty maps
-        return learn_fig, quiz_fig
+    # Canonical and English name (also fixes misspellings, see NAME_ALIASES)
+    resolved = name_resolver.resolve(current_country_from_store)
+    if resolved is None:
+        return None
+    processed_country_name = resolved.name
+    eng_name = resolved.english
+
+    record = COUNTRY_INDEX.get(processed_country_name)
+    if record is None:
+        # If the resolved country is not in the index, return empty map
+        return None
 
-    pts = row.iloc[0]["geometry_points"]
-    cat = row.iloc[0]["category"]
+    cat = record.category
 
     # Case 1: Selected country is a European Microstate - display all of them
     if eng_name in EUROPEAN_MICROSTATES_ENGLISH_CHECK:
-        learn_fig.update_layout(title_text=f"European Microstates (Selected: {processed_country_name})")
-        quiz_fig.update_layout(title_text="Quiz: European Microstates")
-
-        for micro_df_key in EUROPEAN_MICROSTATES_DF_KEYS:
-            micro_row = df[df["country"] == micro_df_key]
-            if micro_row.empty:
-                continue
-            
-            micro_pts_data = micro_row.iloc[0]["geometry_points"]
-            if not micro_pts_data or len(micro_pts_data) == 0 or not isinstance(micro_pts_data[0], list) or len(micro_pts_data[0])!=2 :
-                continue # Skip if no valid points
-
-            micro_lats_calc = [p[0] for p in micro_pts_data]
-            micro_lons_calc = [p[1] for p in micro_pts_data]
-
-            if not micro_lats_calc or not micro_lons_calc:
-                continue
-
-            micro_centroid = dict(lat=sum(micro_lats_calc) / len(micro_lats_calc), 
-                                  lon=sum(micro_lons_calc) / len(micro_lons_calc))
-            
-            marker_color_learn = "darkviolet" if micro_df_key == processed_country_name else "blue"
-            marker_color_quiz = "orange" if micro_df_key == processed_country_name else "red"
-
-
-            learn_fig.add_trace(go.Scattermapbox(
-                lat=[micro_centroid["lat"]], lon=[micro_centroid["lon"]],
-                mode="markers+text", marker=dict(size=12, color=marker_color_learn), name=micro_df_key,
-                text=[micro_df_key], textposition="top right", textfont=dict(size=10)
-            ))
-            quiz_fig.add_trace(go.Scattermapbox(
-                lat=[micro_centroid["lat"]], lon=[micro_centroid["lon"]],
-                mode="markers", marker=dict(size=12, color=marker_color_quiz), name=micro_df_key
-            ))
-        
-        # Center map on Europe to show all microstates
-        map_center_europe = dict(lat=47, lon=12) # Adjusted for better coverage including Malta
-        map_zoom_europe = 3.6
-        learn_fig.update_layout(mapbox_center=map_center_europe, mapbox_zoom=map_zoom_europe)
-        quiz_fig.update_layout(mapbox_center=map_center_europe, mapbox_zoom=map_zoom_europe)
-        return learn_fig, quiz_fig
+        return {"kind": "microstates", "name": processed_country_name,
+                "center": MICROSTATES_CENTER, "zoom": MICROSTATES_ZOOM}
 
     # Case 2: Selected country is Russia or an Asian country (not a European microstate) - display as single dot
     if eng_name == "Russia" or (cat == "Asia" and eng_name not in EUROPEAN_MICROSTATES_ENGLISH_CHECK):
-        if not pts or len(pts) <= 1 or not isinstance(pts[0], list) or len(pts[0])!=2: # Check for valid points for centroid calculation
-            return learn_fig, quiz_fig # Not enough data for centroid
+        centroid = record.centroid
+        if centroid is None:
+            return None # No geometry to place the dot
 
-        lats_calc = [p[0] for p in pts]
-        lons_calc = [p[1] for p in pts]
-        if not lats_calc or not lons_calc:
-             return learn_fig, quiz_fig
-
-        centroid = dict(lat=sum(lats_calc)/len(lats_calc), lon=sum(lons_calc)/len(lons_calc))
         if eng_name == "Russia":
-            centroid = dict(lat=55.7558, lon=37.6173) # Moscow
+            centroid = MOSCOW
 
-        learn_fig.add_trace(go.Scattermapbox(
-            lat=[centroid["lat"]], lon=[centroid["lon"]],
-            mode="markers", marker=dict(size=10, color="blue"), name=processed_country_name
-        ))
-        quiz_fig.add_trace(go.Scattermapbox(
+        return {"kind": "dot", "name": processed_country_name, "center": centroid, "zoom": DOT_ZOOM}
+
+    # Case 3: Default - display as polygon
+    if record.map_center is None: # No polygon geometry
+        return None
+
+    # Center, zoom, level of detail and rounding were precomputed from the bbox at load
+    return {"kind": "polygon", "name": processed_country_name,
+            "center": record.map_center, "zoom": record.map_zoom,
+            "polygons": record.map_polygons, "decimals": record.map_decimals,
+            "learn_color": "red" if processed_country_name == "Italien" else "blue"}
+
+def build_map_figure(current_country_from_store, mode):
+    """Build the learn or quiz map figure for a country"""
+    learn = mode == "learn"
+    fig = go.Figure()
+
+    # Initial layout with explicit mapbox properties
+    fig.update_layout(**BASE_MAP_LAYOUT)
+
+    # Set default title
+    fig.update_layout(title_text="Learn Mode" if learn else "Quiz Mode")
+
+    spec = country_map_spec(current_country_from_store)
+    if spec is None:
+        return fig
+    processed_country_name = spec["name"]
+
+    if spec["kind"] == "microstates":
+        if learn:
+            fig.update_layout(title_text=f"European Microstates (Selected: {processed_country_name})")
+        else:
+            fig.update_layout(title_text="Quiz: European Microstates")
+
+        for micro_df_key, micro_centroid in MICROSTATE_MARKERS:
+            if learn:
+                marker_color_learn = "darkviolet" if micro_df_key == processed_country_name else "blue"
+                fig.add_trace(go.Scattermapbox(
+                    lat=[micro_centroid["lat"]], lon=[micro_centroid["lon"]],
+                    mode="markers+text", marker=dict(size=12, color=marker_color_learn), name=micro_df_key,
+                    text=[micro_df_key], textposition="top right", textfont=dict(size=10)
+                ))
+            else:
+                marker_color_quiz = "orange" if micro_df_key == processed_country_name else "red"
+                fig.add_trace(go.Scattermapbox(
+                    lat=[micro_centroid["lat"]], lon=[micro_centroid["lon"]],
+                    mode="markers", marker=dict(size=12, color=marker_color_quiz), name=micro_df_key
+                ))
+        
+        # Center map on Europe to show all microstates
+        fig.update_layout(mapbox_center=spec["center"], mapbox_zoom=spec["zoom"])
+        return fig
+
+    if spec["kind"] == "dot":
+        centroid = spec["center"]
+        fig.add_trace(go.Scattermapbox(
             lat=[centroid["lat"]], lon=[centroid["lon"]],
-            mode="markers", marker=dict(size=10, color="red"), name=processed_country_name
+            mode="markers", marker=dict(size=10, color="blue" if learn else "red"), name=processed_country_name
         ))
-        learn_fig.update_layout(mapbox_center=centroid, mapbox_zoom=4, title_text=f"Learn: {processed_country_name}")
-        quiz_fig.update_layout(mapbox_center=centroid, mapbox_zoom=4, title_text=f"Quiz: {processed_country_name}")
-        return learn_fig, quiz_fig
+        title = f"Learn: {processed_country_name}" if learn else f"Quiz: {processed_country_name}"
+        fig.update_layout(mapbox_center=centroid, mapbox_zoom=spec["zoom"], title_text=title)
+        return fig
 
-    # Case 3: Default - display as polygon
-    if not pts or len(pts) <= 1 or not isinstance(pts[0], list) or len(pts[0])!=2: # Check for valid polygon points
-        return learn_fig, quiz_fig
-
-    lats_poly = [p[0] for p in pts]
-    lons_poly = [p[1] for p in pts]
-    if pts[0] != pts[-1]: # Ensure polygon is closed
-        lats_poly.append(pts[0][0])
-        lons_poly.append(pts[0][1])
-
-    # Update titles for polygon display
-    learn_fig.update_layout(title_text=f"Learn: {processed_country_name}")
-    quiz_fig.update_layout(title_text=f"Quiz: {processed_country_name}")
+    # Update title for polygon display
+    fig.update_layout(title_text=f"Learn: {processed_country_name}" if learn else f"Quiz: {processed_country_name}")
     
-    color = "red" if processed_country_name == "Italien" else "blue"
-    learn_fig.add_trace(go.Scattermapbox(
-        lat=lats_poly, lon=lons_poly, mode="lines",
-        fill="toself", fillcolor=color, line=dict(width=2, color=color),
-        opacity=0.6, name=processed_country_name
-    ))
-    quiz_fig.add_trace(go.Scattermapbox(
-        lat=lats_poly, lon=lons_poly, mode="lines",
-        fill="toself", fillcolor="red", line=dict(width=2, color="red"),
-        opacity=0.6, name=processed_country_name
+    color = spec["learn_color"] if learn else "red"
+
+    # One choropleth layer draws every ring of the MultiPolygon on its own,
+    # with holes cut out, instead of one stroke connecting all islands
+    fig.add_trace(go.Choroplethmapbox(
+        geojson=polygons_to_geojson(processed_country_name, spec["polygons"]),
+        locations=[processed_country_name], z=[1],
+        colorscale=[[0, color], [1, color]], showscale=False,
+        marker=dict(opacity=0.6, line=dict(width=2, color=color)),
+        name=processed_country_name
     ))
 
-    # Recenter + zoom for polygon
-    lat0, lat1 = min(lats_poly), max(lats_poly)
-    lon0, lon1 = min(lons_poly), max(lons_poly)
-    center_poly = dict(lat=(lat0 + lat1) / 2, lon=(lon0 + lon1) / 2)
-    span_poly = max(lat1 - lat0, lon1 - lon0, 0.1) # Avoid division by zero if span is tiny
-    zoom_poly = max(2, min(12, 4 / span_poly if span_poly > 0 else 2))
-
-    learn_fig.update_layout(mapbox_center=center_poly, mapbox_zoom=zoom_poly)
-    quiz_fig.update_layout(mapbox_center=center_poly, mapbox_zoom=zoom_poly)
+    fig.update_layout(mapbox_center=spec["center"], mapbox_zoom=spec["zoom"])
     
-    return learn_fig, quiz_fig
+    return fig
+
+def map_figure(current_country, mode):
+    """Serialized map figure for (country, mode), served from the figure cache"""
+    key = (current_country, mode, DATA_VERSION)
+    return figure_cache.get_or_build(key, lambda: build_map_figure(current_country, mode).to_dict())
+
+def warm_figure_cache():
+    """Render every country in both modes so first requests hit the cache"""
+    for country in COUNTRY_INDEX:
+        for mode in MAP_MODES:
+            map_figure(country, mode)
+
+def map_updates(current_country, mode):
+    """Values for MAP_OUTPUTS after the current country changed"""
+    if CLIENTSIDE_MAPS:
+        return ()
+    # Only the card for the active mode is visible, so only its map is rendered
+    if mode == "learn":
+        return map_figure(current_country, "learn"), no_update
+    elif mode == "quiz":
+        return no_update, map_figure(current_country, "quiz")
+    return no_update, no_update
+
+if CLIENTSIDE_MAPS:
+    # Same figures, drawn in the browser from the region's geometry bundle
+    app.clientside_callback(
+        ClientsideFunction(namespace="main", function_name="update_map"),
+        Output("country-map", "figure"),
+        Output("quiz-map", "figure"),
+        Input("store-current-country", "data"),
+        Input("store-mode", "data"),
+        State("store-selected-category", "data"),
+        State("store-geometry-url", "data")
+    )
+
+@lru_cache(maxsize=None)
+def geometry_bundle(category):
+    """Serialized map data for every country of a category, for update_map in assets/clientside.js.
+
+    Holds the figure layout shared by all maps, the microstate markers, the
+    category's countries in unshuffled order (for navigate_countries) and
+    country_map_spec() per country, with the polygons at the level of detail
+    of the country's view: delta-encoded integers (RingSet.delta_encode) if
+    they were quantized, GeoJSON coordinates otherwise.
+    """
+    countries = {}
+    for country in CATEGORY_INDEX[category]:
+        spec = country_map_spec(country)
+        if spec is not None and spec["kind"] == "polygon":
+            polygons = spec["polygons"]
+            if spec["decimals"] is None:
+                spec = dict(spec, polygons=polygons.to_coordinates())
+            else:
+                spec = dict(spec, polygons=polygons.delta_encode(spec["decimals"]))
+        countries[country] = spec
+    bundle = {
+        "version": DATA_VERSION,
+        "layout": go.Figure().update_layout(**BASE_MAP_LAYOUT).to_dict()["layout"],
+        "microstates": [[name, centroid["lat"], centroid["lon"]] for name, centroid in MICROSTATE_MARKERS],
+        "order": list(CATEGORY_INDEX[category]),
+        "countries": countries,
+    }
+    return json.dumps(bundle, cls=PlotlyJSONEncoder, separators=(",", ":")).encode("utf-8")
+
+@app.server.route("/_geometry/<version>/<category>.json")
+def serve_geometry_bundle(version, category):
+    # The URL carries the data version, so a bundle never changes and the
+    # browser may keep it for good; the ETag covers revalidation by proxies
+    if version != DATA_VERSION or category not in CATEGORY_INDEX:
+        abort(404)
+    response = Response(geometry_bundle(category), mimetype="application/json")
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.server.route("/_figure-cache")
+def figure_cache_stats():
+    return jsonify(figure_cache.stats())
+
+# Independent of WARMUP, so WARMUP=0 does not turn it off
+if FIGURE_CACHE_WARM:
+    warm_figure_cache()
+
+###############################################################################
+# 11) WARM-UP AND READINESS
+###############################################################################
+def warm_up():
+    """Exercise the cold paths once before traffic arrives (see readiness.py).
+
+    Builds and serializes the map of one country per country_map_spec() kind
+    (microstates, dot, polygon, none) in both modes, which also imports
+    plotly's lazily loaded trace and layout validators, fills the geometry
+    bundles, and renders the layout and dependencies Dash serves on page
+    load. FIGURE_CACHE_WARM=1 is handled at import, whatever WARMUP says.
+    """
+    seen_kinds = set()
+    for country in COUNTRY_INDEX:
+        spec = country_map_spec(country)
+        kind = spec["kind"] if spec else None
+        if kind not in seen_kinds:
+            seen_kinds.add(kind)
+            for mode in MAP_MODES:
+                json.dumps(map_figure(country, mode), cls=PlotlyJSONEncoder)
+    if CLIENTSIDE_MAPS:
+        for category in CATEGORY_INDEX:
+            geometry_bundle(category)
+    client = server.test_client()
+    for path in ["/", "/_dash-layout", "/_dash-dependencies"]:
+        client.get(path)
+
+# /readyz answers 200 once warm_up() has run (WARMUP selects when)
+install_readiness(app, warm_up)
 
 ###############################################################################
 # RUN
 ###############################################################################
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=8080)
+    # Development server only; production runs `gunicorn main:server`
+    app.run(
+        debug=os.environ.get("DASH_DEBUG", "0") == "1",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", "8080"))
+    )
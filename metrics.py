@@ -0,0 +1,286 @@
+"""Per-callback latency and payload metrics for the Dash apps.
+
+install_metrics(app) hooks into the Flask server behind a Dash app and
+records every request to the callback endpoint, labelled with the name of
+the Python function that served it:
+
+    dash_callback_duration_seconds        wall time (histogram)
+    dash_callback_cpu_seconds             CPU time of the serving thread (histogram)
+    dash_callback_request_bytes           request body size (histogram)
+    dash_callback_response_bytes          response body size as sent, i.e. after
+                                          compression (histogram)
+    dash_callback_errors_total            responses with a 5xx status (counter)
+
+They are served in the Prometheus text format at METRICS_PATH (default
+/metrics). Recording costs two clock reads and a few additions under a lock
+per request, so it can stay on; METRICS=0 turns it off.
+
+With several worker processes, set METRICS_DIR to a directory shared by
+them (gunicorn.conf.py does this for more than one worker). Every process
+then writes a snapshot of its numbers to metrics-<pid>.json there, at most every
+METRICS_FLUSH_S seconds (default 1) and at exit, and /metrics, whichever
+worker answers it, reports the sum over all snapshots. Snapshots of exited
+workers stay, so counters never go backwards; empty the directory before
+the server starts.
+"""
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_PATH = "/_dash-update-component"
+
+# Snapshot files of the worker processes in METRICS_DIR ("*" is the pid);
+# nothing else in the directory is read or deleted
+SNAPSHOT_PATTERN = "metrics-*.json"
+
+# Upper bounds of the histogram buckets (+Inf is implied)
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = [
+    ("dash_callback_duration_seconds", "Wall time of Dash callback requests", SECONDS_BUCKETS),
+    ("dash_callback_cpu_seconds", "CPU time of Dash callback requests", SECONDS_BUCKETS),
+    ("dash_callback_request_bytes", "Request body size of Dash callback requests", BYTES_BUCKETS),
+    ("dash_callback_response_bytes", "Response body size of Dash callback requests as sent", BYTES_BUCKETS),
+]
+
+
+class Histogram:
+    """Cumulative-bucket histogram; not locked itself, see CallbackMetrics"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def snapshot(self):
+        return {"counts": list(self.counts), "sum": self.sum}
+
+    def merge(self, snapshot):
+        """Add the counts of another process' snapshot of the same histogram"""
+        counts, total = snapshot["counts"], snapshot["sum"]
+        if len(counts) != len(self.counts) or not all(isinstance(n, int) for n in counts):
+            raise ValueError("bucket layout differs")
+        if not isinstance(total, (int, float)):
+            raise ValueError("sum is not a number")
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {total}"
+
+
+class CallbackMetrics:
+    """Histograms and error counts per callback name, safe across threads.
+
+    With a `directory`, the numbers of this process are also written there
+    as metrics-<pid>.json and render() sums the snapshots of all processes.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+        if directory:
+            atexit.register(self.flush)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._series = {}
+        self._errors = {}
+        self._dirty = False
+        self._flusher = None
+
+    def _check_pid(self):
+        # After a fork the numbers belong to the parent (and its snapshot);
+        # the child starts from zero. Called with the lock held.
+        if self._pid != os.getpid():
+            self._reset()
+
+    def observe(self, callback, wall, cpu, request_bytes, response_bytes, error):
+        with self._lock:
+            self._check_pid()
+            series = self._series.get(callback)
+            if series is None:
+                series = self._series[callback] = [Histogram(buckets) for _, _, buckets in HISTOGRAMS]
+                self._errors[callback] = 0
+            for histogram, value in zip(series, (wall, cpu, request_bytes, response_bytes)):
+                histogram.observe(value)
+            if error:
+                self._errors[callback] += 1
+            self._dirty = True
+            if self.directory and self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+                self._flusher.start()
+
+    def _snapshot(self):
+        return {
+            "series": {callback: [h.snapshot() for h in series] for callback, series in self._series.items()},
+            "errors": dict(self._errors),
+        }
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process' snapshot to the directory if it changed"""
+        if not self.directory:
+            return
+        with self._lock:
+            self._check_pid()
+            if not self._dirty:
+                return
+            snapshot = self._snapshot()
+            self._dirty = False
+        path = _snapshot_path(self.directory, os.getpid())
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.warning("Could not write metrics snapshot %s: %s", path, e)
+
+    def _other_snapshots(self):
+        own = _snapshot_path(self.directory, os.getpid())
+        for path in glob.glob(os.path.join(self.directory, SNAPSHOT_PATTERN)):
+            if path == own:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    yield json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping metrics snapshot %s: %s", path, e)
+
+    def render(self):
+        """All series in the Prometheus text exposition format, summed over
+        the processes sharing the directory"""
+        with self._lock:
+            self._check_pid()
+            snapshots = [self._snapshot()]
+        if self.directory:
+            # This process' own numbers come from memory, not its older file
+            snapshots += self._other_snapshots()
+        series, errors = {}, {}
+        for snapshot in snapshots:
+            try:
+                snapshot_series, snapshot_errors = _parse_snapshot(snapshot)
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                logger.warning("Skipping malformed metrics snapshot: %s", e)
+                continue
+            for callback, histograms in snapshot_series.items():
+                merged = series.get(callback)
+                if merged is None:
+                    series[callback] = histograms
+                else:
+                    for histogram, other in zip(merged, histograms):
+                        histogram.merge(other.snapshot())
+            for callback, count in snapshot_errors.items():
+                errors[callback] = errors.get(callback, 0) + count
+
+        lines = []
+        for i, (name, help_text, _) in enumerate(HISTOGRAMS):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for callback, histograms in sorted(series.items()):
+                lines += histograms[i].lines(name, f'callback="{_escape(callback)}"')
+        lines += ["# HELP dash_callback_errors_total Dash callback requests answered with a 5xx status",
+                  "# TYPE dash_callback_errors_total counter"]
+        for callback, count in sorted(errors.items()):
+            lines.append(f'dash_callback_errors_total{{callback="{_escape(callback)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, SNAPSHOT_PATTERN.replace("*", str(pid)))
+
+
+def _parse_snapshot(snapshot):
+    """(callback -> Histograms, callback -> error count) of a snapshot dict;
+    raises for anything that is not one, so a stray file cannot count"""
+    if not isinstance(snapshot, dict):
+        raise TypeError(f"expected an object, got {type(snapshot).__name__}")
+    series = {}
+    for callback, histograms in snapshot["series"].items():
+        if not isinstance(callback, str) or len(histograms) != len(HISTOGRAMS):
+            raise ValueError(f"bad series for {callback!r}")
+        series[callback] = [Histogram(buckets) for _, _, buckets in HISTOGRAMS]
+        for histogram, other in zip(series[callback], histograms):
+            histogram.merge(other)
+    errors = {}
+    for callback, count in snapshot["errors"].items():
+        if not isinstance(callback, str) or not isinstance(count, int):
+            raise ValueError(f"bad error count for {callback!r}")
+        errors[callback] = count
+    return series, errors
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def callback_name(app, body):
+    """Name of the function serving a callback request, or its output id"""
+    output = (body or {}).get("output", "")
+    entry = app.callback_map.get(output)
+    func = entry.get("callback") if entry else None
+    return getattr(func, "__name__", None) or output or "unknown"
+
+
+def install_metrics(app, path=None):
+    """Record callback requests of a Dash app and serve them at `path`.
+
+    Returns the CallbackMetrics, or None when METRICS=0.
+    """
+    if os.environ.get("METRICS", "1") == "0":
+        return None
+    path = path or os.environ.get("METRICS_PATH", "/metrics")
+    directory = os.environ.get("METRICS_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    metrics = CallbackMetrics(directory, float(os.environ.get("METRICS_FLUSH_S", "1")))
+    server = app.server
+
+    @server.before_request
+    def start_callback_timer():
+        if request.path.endswith(CALLBACK_PATH):
+            g.callback_started = (time.perf_counter(), time.thread_time())
+
+    @server.after_request
+    def record_callback(response):
+        started = g.pop("callback_started", None)
+        if started is not None:
+            wall = time.perf_counter() - started[0]
+            cpu = time.thread_time() - started[1]
+            name = callback_name(app, request.get_json(silent=True))
+            response_bytes = response.content_length
+            if response_bytes is None:
+                response_bytes = 0 if response.is_streamed else len(response.get_data())
+            metrics.observe(name, wall, cpu, request.content_length or 0, response_bytes,
+                            response.status_code >= 500)
+        return response
+
+    @server.route(path)
+    def serve_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    return metrics
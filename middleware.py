@@ -0,0 +1,25 @@
+"""Request hooks shared by the Dash apps, installed in one fixed order.
+
+install_middleware(app) adds profiling (profiling.py), metrics (metrics.py)
+and compression (compression.py) to the Flask server behind a Dash app.
+Flask runs before-request hooks in the order they were registered and
+after-request hooks in reverse, so the order of the calls below decides
+what each hook sees:
+
+    profiling     registered first, so its profile is the outermost: it ends
+                  after the metrics recorded the request, and writing a dump
+                  is not counted as callback time
+    metrics       sees the response after compression, i.e. the size as sent
+    compression   registered last, so it runs first after the callback; it
+                  keeps the uncompressed body on flask.g for the profile dump
+"""
+from compression import install_compression
+from metrics import install_metrics
+from profiling import install_profiling
+
+
+def install_middleware(app):
+    """Install profiling, metrics and compression on a Dash app's server"""
+    install_profiling(app)
+    install_metrics(app)
+    install_compression(app)
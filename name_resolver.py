@@ -0,0 +1,147 @@
+"""Country name resolution for main.py, precomputed once at load.
+
+Every country of the region files (the canonical, German names) is resolved
+up front: German name -> English name (COUNTRY_MAP) -> ISO3 code
+(COUNTRY_TO_CODE) -> feature id in the geometry store. Where a step has no
+table entry, or the ISO3 code is not a feature id (Kosovo is "CS-KM" in
+geo.json), the English and German names are matched against the feature
+names of the geometry store instead, but only when they are (nearly) equal:
+a wrong shape is worse than none. Those bindings are listed in `matched`
+with their score, countries that still have no geometry in `unresolved`, so
+main.py can report both at startup.
+
+Lookups go through one index of normalized keys (case, accents, punctuation
+and spacing removed) that holds the canonical, English and alias spellings
+of every country; anything else falls back to trigram similarity over those
+keys, memoized per spelling. Fuzzy matches never pair a name with a longer
+one that contains it (beyond a single typed letter), so "Niger" does not
+become "Nigeria", nor "Sudan" "South Sudan".
+"""
+import re
+import unicodedata
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+# name       canonical name, as in the region files
+# english    English name
+# geometry   feature id in the geometry store, or None
+ResolvedName = namedtuple("ResolvedName", ["name", "english", "geometry"])
+
+# Minimum Dice coefficient of the trigram sets for a fuzzy match of a
+# spelling, and for binding a country to a geometry by name
+MIN_SIMILARITY = 0.6
+GEOMETRY_MIN_SIMILARITY = 0.85
+
+# A key contained in another one only matches it if it is at most this many
+# characters shorter (a dropped or extra letter)
+MAX_CONTAINED_DIFFERENCE = 1
+
+
+def normalize(name):
+    """Lookup key of a name: lower case, no accents or punctuation, single spaces"""
+    name = unicodedata.normalize("NFKD", name.casefold().replace("ß", "ss"))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name).split())
+
+
+def _letters(key):
+    return len(key) - key.count(" ")
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Best fuzzy match of a key among a fixed set of keys"""
+
+    def __init__(self, keys, min_similarity=MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        self._grams = {key: trigrams(key) for key in keys}
+        self._postings = {}
+        for key, grams in self._grams.items():
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(key)
+
+    def match(self, key):
+        """(most similar key, score), or (None, 0.0) if none reaches
+        `min_similarity`; keys that contain `key` or are contained in it
+        only match if their lengths differ by at most MAX_CONTAINED_DIFFERENCE"""
+        if key in self._grams:
+            return key, 1.0
+        grams = trigrams(key)
+        shared = Counter(other for gram in grams for other in self._postings.get(gram, ()))
+        best_key, best_score = None, self.min_similarity
+        for other, n in shared.items():
+            if (key in other or other in key) and abs(_letters(key) - _letters(other)) > MAX_CONTAINED_DIFFERENCE:
+                continue
+            score = 2 * n / (len(grams) + len(self._grams[other]))
+            if score >= best_score and (best_key is None or score > best_score or other < best_key):
+                best_key, best_score = other, score
+        return (best_key, best_score) if best_key is not None else (None, 0.0)
+
+    def best(self, key):
+        """Most similar key, or None if none reaches `min_similarity`"""
+        return self.match(key)[0]
+
+
+class NameResolver:
+    """Canonical name, English name and geometry id of every known country.
+
+    `names` are the canonical country names, `english_names` maps canonical
+    names to English, `codes` English names to ISO3, `geometry_names` feature
+    ids of the geometry store to their (English) names, and `aliases` extra
+    spellings (typos, short forms) to a canonical or English name.
+
+    `matched` maps the countries bound to a geometry by name instead of code
+    to (geometry id, geometry name, score); `unresolved` lists those without.
+    """
+
+    def __init__(self, names, english_names, codes, geometry_names, aliases=None):
+        geometry_by_key = {}
+        for geometry_id, geometry_name in geometry_names.items():
+            if geometry_name:
+                geometry_by_key.setdefault(normalize(geometry_name), geometry_id)
+        geometry_index = TrigramIndex(geometry_by_key, GEOMETRY_MIN_SIMILARITY)
+
+        self._resolved = {}
+        self._keys = {}
+        self.matched = {}
+        for name in names:
+            english = english_names.get(name, name)
+            geometry = codes.get(english)
+            if geometry not in geometry_names and name not in self._resolved:
+                match, score = max(geometry_index.match(normalize(english)), geometry_index.match(normalize(name)),
+                                   key=lambda candidate: candidate[1])
+                geometry = geometry_by_key[match] if match else None
+                if match:
+                    self.matched[name] = (geometry, geometry_names[geometry], score)
+            self._resolved.setdefault(name, ResolvedName(name, english, geometry))
+            # Canonical spellings win over English ones of another country
+            self._keys[normalize(name)] = name
+        for resolved in self._resolved.values():
+            self._keys.setdefault(normalize(resolved.english), resolved.name)
+        # Further spellings: English table entries of names not in the region
+        # files (e.g. "Vereinigte Staaten"), then the explicit aliases
+        extra = {alias: english for alias, english in english_names.items() if alias not in self._resolved}
+        extra.update(aliases or {})
+        for alias, target in extra.items():
+            name = self._keys.get(normalize(target))
+            if name is not None:
+                self._keys.setdefault(normalize(alias), name)
+
+        self._index = TrigramIndex(self._keys)
+        self.unresolved = [name for name, resolved in self._resolved.items() if resolved.geometry is None]
+        self.resolve = lru_cache(maxsize=1024)(self._resolve)
+
+    def _resolve(self, spelling):
+        """ResolvedName for any spelling of a country, or None"""
+        if spelling in self._resolved:
+            return self._resolved[spelling]
+        key = normalize(spelling)
+        name = self._keys.get(key)
+        if name is None:
+            match = self._index.best(key)
+            name = self._keys[match] if match else None
+        return self._resolved.get(name)
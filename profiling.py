@@ -0,0 +1,134 @@
+"""Opt-in profiling of slow Dash callback invocations.
+
+With PROFILE_CALLBACKS=1, install_profiling(app) runs cProfile around a
+sample of callback requests. Every profiled request that takes longer than
+the threshold leaves two files in PROFILE_DIR:
+
+    <time>-<callback>-<pid>-<n>.prof   pstats dump, e.g. `python -m pstats
+                                       <file>` or snakeviz
+    <time>-<callback>-<pid>-<n>.json   callback name, wall/CPU time, status,
+                                       the request's inputs and state, and the
+                                       small output values (e.g. the country
+                                       a map was drawn for; figures are left
+                                       out)
+
+Settings:
+
+    PROFILE_CALLBACKS      "1" to enable (default off)
+    PROFILE_SAMPLE_RATE    fraction of callback requests to profile (default 1.0)
+    PROFILE_THRESHOLD_MS   minimum wall time for a dump (default 200)
+    PROFILE_DIR            output directory (default: guess_country_profiles
+                           in the temp directory)
+"""
+import cProfile
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import time
+
+from flask import g, request
+
+from metrics import CALLBACK_PATH, callback_name
+
+logger = logging.getLogger(__name__)
+
+# Output values whose JSON is longer than this are left out of the .json dump
+MAX_VALUE_CHARS = 200
+
+# Numbers the dumps of this process, so names stay unique within a second
+_dump_numbers = itertools.count(1)
+
+
+def _small_outputs(body):
+    """{"component.prop": value} for the short values of a callback response"""
+    try:
+        response = json.loads(body).get("response", {})
+    except (ValueError, AttributeError):
+        return {}
+    outputs = {}
+    for component_id, props in response.items():
+        for prop, value in props.items():
+            text = json.dumps(value, ensure_ascii=False)
+            outputs[f"{component_id}.{prop}"] = value if len(text) <= MAX_VALUE_CHARS else f"<{len(text)} chars>"
+    return outputs
+
+
+def _response_body(response):
+    """Uncompressed body of a response, also after compression.py rewrote it"""
+    body = g.get("uncompressed_body")
+    if body is not None:
+        return body
+    if response.is_streamed or "Content-Encoding" in response.headers:
+        return b""
+    return response.get_data()
+
+
+def _dump(directory, name, profile, info):
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)[:80]
+    stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{os.getpid()}-{next(_dump_numbers)}"
+    path = os.path.join(directory, stem)
+    profile.dump_stats(path + ".prof")
+    with open(path + ".json", "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2, default=str)
+    return path + ".prof"
+
+
+def install_profiling(app):
+    """Profile sampled callback requests of a Dash app when PROFILE_CALLBACKS=1.
+
+    Returns the output directory, or None when profiling is off.
+    """
+    if os.environ.get("PROFILE_CALLBACKS", "0") != "1":
+        return None
+    sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "1.0"))
+    threshold = float(os.environ.get("PROFILE_THRESHOLD_MS", "200")) / 1000
+    directory = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "guess_country_profiles"))
+    os.makedirs(directory, exist_ok=True)
+    server = app.server
+
+    @server.before_request
+    def start_callback_profile():
+        if request.path.endswith(CALLBACK_PATH) and random.random() < sample_rate:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is active in this thread
+                return
+            g.callback_profile = (profile, time.perf_counter(), time.thread_time())
+
+    @server.after_request
+    def dump_slow_callback(response):
+        started = g.pop("callback_profile", None)
+        if started is None:
+            return response
+        profile, wall_start, cpu_start = started
+        profile.disable()
+        wall = time.perf_counter() - wall_start
+        if wall < threshold:
+            return response
+        body = request.get_json(silent=True) or {}
+        name = callback_name(app, body)
+        info = {
+            "callback": name,
+            "wall_ms": round(wall * 1000, 3),
+            "cpu_ms": round((time.thread_time() - cpu_start) * 1000, 3),
+            "status": response.status_code,
+            "inputs": body.get("inputs"),
+            "state": body.get("state"),
+            "changed": body.get("changedPropIds"),
+            "outputs": _small_outputs(_response_body(response)),
+        }
+        try:
+            path = _dump(directory, name, profile, info)
+        except OSError as e:
+            logger.warning("Could not write callback profile to %s: %s", directory, e)
+        else:
+            logger.warning("Slow callback %s (%.0f ms), profile written to %s", name, wall * 1000, path)
+        return response
+
+    return directory
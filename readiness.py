@@ -0,0 +1,93 @@
+"""Startup warm-up and a readiness endpoint for the Dash apps.
+
+install_readiness(app, warm_up) runs the app's warm-up function (build one
+figure per code path, fill caches, import lazily loaded modules) and serves
+the result at /readyz: 200 once warm-up has finished, 503 before that or if
+it failed, so a load balancer only sends traffic to warm workers.
+
+WARMUP selects when warm-up runs:
+
+    import       during import of the app (default); with gunicorn's
+                 preload_app this happens once in the master, and the workers
+                 start warm
+    background   in a thread started by the first request a process gets
+                 (typically the load balancer's first /readyz probe)
+    0            never; /readyz reports ready right away
+"""
+import logging
+import os
+import threading
+import time
+
+from flask import jsonify
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Warm-up state of one process"""
+
+    def __init__(self, warm_up):
+        self.warm_up = warm_up
+        self.error = None
+        self.duration = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._started_in = None
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    def run(self):
+        """Run the warm-up in the calling thread"""
+        start = time.perf_counter()
+        try:
+            self.warm_up()
+        except Exception as e:  # reported by /readyz instead of killing the worker
+            logger.exception("Warm-up failed")
+            self.error = f"{type(e).__name__}: {e}"
+        self.duration = time.perf_counter() - start
+        self._done.set()
+
+    def start_background(self):
+        """Start the warm-up thread, once per process"""
+        if self._started_in == os.getpid():
+            return
+        with self._lock:
+            if self._started_in == os.getpid():
+                return
+            self._started_in = os.getpid()
+        threading.Thread(target=self.run, name="warm-up", daemon=True).start()
+
+    def skip(self):
+        self.duration = 0.0
+        self._done.set()
+
+    def status(self):
+        if not self._done.is_set():
+            state = "warming up"
+        else:
+            state = "ready" if self.error is None else "failed"
+        return {"status": state, "warm_up_s": self.duration, "error": self.error, "pid": os.getpid()}
+
+
+def install_readiness(app, warm_up, path="/readyz"):
+    """Warm up a Dash app as configured by WARMUP and serve its readiness at `path`"""
+    readiness = Readiness(warm_up)
+    mode = os.environ.get("WARMUP", "import")
+    server = app.server
+
+    @server.route(path)
+    def serve_readiness():
+        return jsonify(readiness.status()), 200 if readiness.ready else 503
+
+    if mode == "0":
+        readiness.skip()
+    elif mode == "background":
+        server.before_request(readiness.start_background)
+    elif mode == "import":
+        readiness.run()
+    else:
+        raise ValueError(f"Unknown WARMUP {mode!r} (expected import, background or 0)")
+    return readiness
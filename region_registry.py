@@ -0,0 +1,65 @@
+"""Declarative region registry for main.py, read from regions.json.
+
+regions.json lists the region source files and, in dropdown order, the
+regions built from them:
+
+    sources   source key -> JSON file with [{"country": ..., ...}, ...]
+    all       name and label of the extra category holding every region
+    names     JSON file with the country name tables (see below)
+    regions   [{"name", "label" (default: name), "sources": [source keys],
+               "countries": optional list of countries to keep}]
+
+A region takes the countries of its sources in order; with "countries" only
+those are kept. The names file maps the (German) country names of the
+sources to English ("english"), English names to ISO3 codes ("codes"), and
+misspellings to a German or English name ("aliases"); main.py resolves
+countries to their geometry with them (see name_resolver.py). Adding a
+region, a country or a spelling is a data change only. geometry_store.py
+compiles the sources named here into geometry.bin.
+"""
+import json
+import os
+from collections import namedtuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+REGISTRY_SOURCE = "regions.json"
+
+Region = namedtuple("Region", ["name", "label", "sources", "countries"])
+CountryNames = namedtuple("CountryNames", ["english", "codes", "aliases"])
+RegionRegistry = namedtuple("RegionRegistry", ["sources", "all_category", "all_label", "regions", "names"])
+
+
+def load_region_registry(path=os.path.join(BASE_DIR, REGISTRY_SOURCE)):
+    """Parse and check regions.json; raises ValueError for unknown source keys"""
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    sources = dict(spec["sources"])
+    regions = []
+    for entry in spec["regions"]:
+        unknown = [key for key in entry["sources"] if key not in sources]
+        if unknown:
+            raise ValueError(f"Region {entry['name']!r} uses unknown sources {unknown}")
+        countries = entry.get("countries")
+        regions.append(Region(entry["name"], entry.get("label", entry["name"]), tuple(entry["sources"]),
+                              frozenset(countries) if countries is not None else None))
+    with open(os.path.join(os.path.dirname(path), spec["names"]), "r", encoding="utf-8") as f:
+        names = json.load(f)
+    return RegionRegistry(sources, spec["all"]["name"], spec["all"].get("label", spec["all"]["name"]),
+                          tuple(regions),
+                          CountryNames(names["english"], names["codes"], names.get("aliases", {})))
+
+
+def region_countries(region, source_lists):
+    """Country objects of a region, given the parsed lists of all sources"""
+    countries = [country for key in region.sources for country in source_lists[key]]
+    if region.countries is not None:
+        countries = [country for country in countries if country["country"] in region.countries]
+    return countries
+
+
+def category_options(registry):
+    """Dropdown options: the combined category first, then every region"""
+    return [{"label": registry.all_label, "value": registry.all_category}] + [
+        {"label": region.label, "value": region.name} for region in registry.regions
+    ]
@@ -0,0 +1,233 @@
+"""Server-side session state with expiry, keyed by a session id.
+
+Callbacks keep per-session state (scores, shuffle seed, position, ...) here
+instead of round-tripping it through dcc.Store, so the browser only holds
+the session id. Values are JSON-serializable dicts. Every backend has
+update(session_id, change), which reads, changes and writes a session
+atomically, so concurrent requests of one session (a double-submitted
+guess) cannot overwrite each other.
+
+Backends:
+
+    MemorySessionStore   in-process LRU, for a single worker
+    SqliteSessionStore   SQLite file shared by all workers on one host
+    RedisSessionStore    Redis, for several hosts (needs the `redis` package)
+
+session_store_from_env() picks one from the environment:
+
+    SESSION_BACKEND       memory (default), sqlite or redis
+    SESSION_TTL           seconds of inactivity before a session expires (default 3600)
+    SESSION_MAXSIZE       memory backend: maximum number of sessions (default 10000)
+    SESSION_SQLITE_PATH   sqlite backend: database file (default: in the temp
+                          directory, named after a digest of the app directory)
+    SESSION_REDIS_URL     redis backend: connection URL (default redis://localhost:6379/0)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from lru import LRUCache
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+class MemorySessionStore:
+    """Thread-safe store of sessions; entries expire `ttl` seconds after their
+    last write, and beyond `maxsize` the least recently written go first.
+
+    Reads do not reorder the entries, so they stay in order of expiry and
+    _purge() can stop at the first live one.
+    """
+
+    # Lock stripes for update(); sessions sharing one only wait for each other
+    SESSION_LOCKS = 64
+
+    def __init__(self, maxsize=10000, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        # update() serializes per session on one of these, picked by id
+        self._session_locks = [threading.Lock() for _ in range(self.SESSION_LOCKS)]
+
+    def get(self, session_id):
+        """The session's state, or None if it is unknown or expired"""
+        with self._lock:
+            entry = self._entries.peek(session_id)
+            if entry is None:
+                return None
+            expires, state = entry
+            if expires <= time.time():
+                self._entries.pop(session_id)
+                return None
+            return dict(state)
+
+    def set(self, session_id, state):
+        with self._lock:
+            # put() also trims the store to maxsize
+            self._entries.put(session_id, (time.time() + self.ttl, dict(state)))
+            self._purge()
+
+    def update(self, session_id, change):
+        """Write change(state or None) unless it returns None; returns the
+        session's state afterwards"""
+        with self._session_locks[hash(session_id) % self.SESSION_LOCKS]:
+            state = self.get(session_id)
+            new_state = change(state)
+            if new_state is None:
+                return state
+            self.set(session_id, new_state)
+            return new_state
+
+    def delete(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id)
+
+    def _purge(self):
+        # Oldest writes first: drop them while they are expired
+        now = time.time()
+        while True:
+            oldest = self._entries.oldest()
+            if oldest is None or oldest[1][0] > now:
+                break
+            self._entries.pop(oldest[0])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteSessionStore:
+    """Sessions in a SQLite file, so every worker process on the host sees them"""
+
+    # Expired rows are deleted on every PURGE_INTERVAL-th write
+    PURGE_INTERVAL = 100
+
+    def __init__(self, path, ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions "
+                         "(id TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id):
+        row = self._connection().execute(
+            "SELECT state FROM sessions WHERE id = ? AND expires > ?", (session_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, session_id, state):
+        with self._connection() as conn:
+            self._write(conn, session_id, state)
+
+    def _write(self, conn, session_id, state):
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO sessions (id, state, expires) VALUES (?, ?, ?)",
+                     (session_id, json.dumps(state), now + self.ttl))
+        with self._writes_lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_INTERVAL == 0
+        if purge:
+            conn.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+
+    def update(self, session_id, change):
+        """Write change(state or None) unless it returns None; returns the
+        session's state afterwards"""
+        conn = self._connection()
+        with conn:
+            # Take the write lock before reading, so no other process or
+            # thread changes the session in between
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT state FROM sessions WHERE id = ? AND expires > ?",
+                               (session_id, time.time())).fetchone()
+            state = json.loads(row[0]) if row else None
+            new_state = change(state)
+            if new_state is None:
+                return state
+            self._write(conn, session_id, new_state)
+            return new_state
+
+    def delete(self, session_id):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+
+class RedisSessionStore:
+    """Sessions in Redis; expiry is left to Redis key TTLs"""
+
+    def __init__(self, url, ttl=3600, prefix="session:"):
+        import redis  # optional dependency, only needed for this backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, session_id):
+        value = self._client.get(self.prefix + session_id)
+        return json.loads(value) if value is not None else None
+
+    def set(self, session_id, state):
+        self._client.setex(self.prefix + session_id, self.ttl, json.dumps(state))
+
+    def update(self, session_id, change):
+        """Write change(state or None) unless it returns None; returns the
+        session's state afterwards. Optimistic: `change` is called again if
+        another client wrote the session in the meantime."""
+        import redis
+        key = self.prefix + session_id
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    state = json.loads(value) if value is not None else None
+                    new_state = change(state)
+                    if new_state is None:
+                        pipe.unwatch()
+                        return state
+                    pipe.multi()
+                    pipe.setex(key, self.ttl, json.dumps(new_state))
+                    pipe.execute()
+                    return new_state
+                except redis.WatchError:
+                    continue
+
+    def delete(self, session_id):
+        self._client.delete(self.prefix + session_id)
+
+
+def _app_key():
+    """Short digest of the app directory, so the default database of one
+    checkout is not shared with another deployment on the same host"""
+    return hashlib.sha1(os.path.dirname(os.path.abspath(__file__)).encode("utf-8")).hexdigest()[:12]
+
+
+def session_store_from_env():
+    """Session store configured by the SESSION_* environment variables"""
+    backend = os.environ.get("SESSION_BACKEND", "memory")
+    ttl = int(os.environ.get("SESSION_TTL", "3600"))
+    if backend == "memory":
+        return MemorySessionStore(maxsize=int(os.environ.get("SESSION_MAXSIZE", "10000")), ttl=ttl)
+    if backend == "sqlite":
+        default_path = os.path.join(tempfile.gettempdir(), f"guess_country_sessions-{_app_key()}.sqlite3")
+        return SqliteSessionStore(os.environ.get("SESSION_SQLITE_PATH", default_path), ttl=ttl)
+    if backend == "redis":
+        return RedisSessionStore(os.environ.get("SESSION_REDIS_URL", "redis://localhost:6379/0"), ttl=ttl)
+    raise ValueError(f"Unknown SESSION_BACKEND {backend!r} (expected memory, sqlite or redis)")
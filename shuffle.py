@@ -0,0 +1,39 @@
+"""Seeded shuffles for compact session state.
+
+Instead of whole shuffled lists, the dcc.Stores only hold a seed and a
+position; the order is rebuilt from the seed whenever it is needed. The
+generator (mulberry32) and the Fisher-Yates loop are mirrored bit for bit in
+assets/clientside.js, so the browser and the server agree on every order.
+"""
+import random
+
+_MASK = 0xFFFFFFFF
+
+
+def new_seed():
+    """Random 32-bit seed for a new session"""
+    return random.getrandbits(32)
+
+
+def _imul(a, b):
+    return (a * b) & _MASK
+
+
+def mulberry32(seed):
+    """Infinite stream of floats in [0, 1), identical to the JS mulberry32"""
+    state = seed & _MASK
+    while True:
+        state = (state + 0x6D2B79F5) & _MASK
+        t = _imul(state ^ (state >> 15), state | 1)
+        t ^= (t + _imul(t ^ (t >> 7), t | 61)) & _MASK
+        yield ((t ^ (t >> 14)) & _MASK) / 4294967296.0
+
+
+def shuffled(items, seed):
+    """New list with `items` in the Fisher-Yates order given by `seed`"""
+    items = list(items)
+    rand = mulberry32(seed)
+    for i in range(len(items) - 1, 0, -1):
+        j = int(next(rand) * (i + 1))
+        items[i], items[j] = items[j], items[i]
+    return items
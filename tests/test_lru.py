@@ -0,0 +1,29 @@
+"""Shared LRU helper and the compressed body cache built on it."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compression import CompressedBodyCache  # noqa: E402
+from lru import LRUCache  # noqa: E402
+
+
+def test_evicts_least_recently_used_by_weight():
+    cache = LRUCache(10, weigh=len)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"123")
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.stats()["size"] == 8
+    cache.put("d", b"x" * 11)
+    assert "d" not in cache
+
+
+def test_compressed_body_is_cached_on_second_sighting():
+    cache = CompressedBodyCache(1024)
+    cache.admit("once", b"body")
+    assert cache.get("once") is None
+    cache.admit("once", b"body")
+    assert cache.get("once") == b"body"
+    assert cache.stats()["first_sightings"] == 1
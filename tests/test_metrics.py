@@ -0,0 +1,38 @@
+"""/metrics sums worker snapshots and ignores other files of METRICS_DIR."""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import CallbackMetrics  # noqa: E402
+
+
+def _count(text, callback):
+    prefix = f'dash_callback_duration_seconds_count{{callback="{callback}"}} '
+    return [int(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_render_sums_snapshots_and_skips_stray_files(tmp_path):
+    other = CallbackMetrics()
+    other.observe("show_country", 0.01, 0.01, 100, 1000, False)
+    other.observe("show_country", 0.02, 0.01, 100, 1000, True)
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other._snapshot()))
+    # Files that are not snapshots, or broken ones, must neither count nor fail
+    (tmp_path / "regions.json").write_text(json.dumps({"series": {"show_country": []}}))
+    (tmp_path / "metrics-2.json").write_text(json.dumps([1, 2, 3]))
+    (tmp_path / "metrics-3.json").write_text(json.dumps({"errors": {}}))
+    (tmp_path / "metrics-4.json").write_text("{")
+
+    metrics = CallbackMetrics(str(tmp_path))
+    metrics.observe("show_country", 0.03, 0.01, 100, 1000, False)
+    text = metrics.render()
+    assert _count(text, "show_country") == [3]
+    assert 'dash_callback_errors_total{callback="show_country"} 1' in text
+
+
+def test_flush_writes_prefixed_snapshot(tmp_path):
+    metrics = CallbackMetrics(str(tmp_path))
+    metrics.observe("show_country", 0.01, 0.01, 100, 1000, False)
+    metrics.flush()
+    assert os.listdir(tmp_path) == [f"metrics-{os.getpid()}.json"]
@@ -0,0 +1,30 @@
+"""Fuzzy name matching never binds a country to a neighbour's shape."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_resolver import NameResolver  # noqa: E402
+
+GEOMETRY_NAMES = {"NGA": "Nigeria", "SSD": "South Sudan", "CS-KM": "Kosovo", "DEU": "Germany"}
+
+
+def test_contained_names_stay_unresolved():
+    resolver = NameResolver(["Niger", "Sudan"], {}, {}, GEOMETRY_NAMES)
+    assert resolver.unresolved == ["Niger", "Sudan"]
+    assert resolver.matched == {}
+
+
+def test_name_match_is_reported():
+    resolver = NameResolver(["Kosovo"], {}, {"Kosovo": "XKX"}, GEOMETRY_NAMES)
+    assert resolver.resolve("Kosovo").geometry == "CS-KM"
+    assert resolver.matched == {"Kosovo": ("CS-KM", "Kosovo", 1.0)}
+
+
+def test_runtime_lookup_rejects_contained_names_but_fixes_typos():
+    resolver = NameResolver(["Nigeria", "South Sudan", "Deutschland"], {"Deutschland": "Germany"},
+                            {"Nigeria": "NGA", "South Sudan": "SSD", "Germany": "DEU"}, GEOMETRY_NAMES)
+    assert resolver.resolve("Niger") is None
+    assert resolver.resolve("Sudan") is None
+    assert resolver.resolve("Deutschlan").geometry == "DEU"
+    assert resolver.resolve("Nigeriaa").geometry == "NGA"
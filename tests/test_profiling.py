@@ -0,0 +1,51 @@
+"""Profile dumps keep the callback outputs when responses are compressed."""
+import glob
+import json
+import os
+import sys
+
+import pytest
+from dash import Dash, Input, Output, dcc, html
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from middleware import install_middleware  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_CALLBACKS", "1")
+    monkeypatch.setenv("PROFILE_THRESHOLD_MS", "0")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    app = Dash(__name__)
+    app.layout = html.Div([html.Button(id="next"), dcc.Store(id="country"), html.Div(id="text")])
+
+    @app.callback(Output("country", "data"), Output("text", "children"), Input("next", "n_clicks"))
+    def show_country(n_clicks):
+        # Long enough output that the response gets compressed
+        return "Kenia", "Kenia " * 500
+
+    install_middleware(app)
+    return app.server.test_client()
+
+
+CALLBACK_REQUEST = {
+    "output": "..country.data...text.children..",
+    "outputs": [{"id": "country", "property": "data"}, {"id": "text", "property": "children"}],
+    "inputs": [{"id": "next", "property": "n_clicks", "value": 1}],
+    "changedPropIds": ["next.n_clicks"],
+    "state": [],
+}
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "identity"])
+def test_dump_names_country(client, tmp_path, encoding):
+    response = client.post("/_dash-update-component", json=CALLBACK_REQUEST,
+                           headers={"Accept-Encoding": encoding})
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == (encoding if encoding == "gzip" else None)
+    [dump] = glob.glob(os.path.join(tmp_path, "*.json"))
+    with open(dump, encoding="utf-8") as f:
+        info = json.load(f)
+    assert info["callback"] == "show_country"
+    assert info["outputs"]["country.data"] == "Kenia"
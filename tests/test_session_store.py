@@ -0,0 +1,60 @@
+"""Session stores expire and evict by write time."""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import MemorySessionStore, SqliteSessionStore  # noqa: E402
+
+
+def test_reads_do_not_keep_expired_sessions_alive(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    store = MemorySessionStore(maxsize=10, ttl=60)
+    store.set("a", {"n": 1})
+    now[0] += 30
+    store.set("b", {"n": 2})
+    store.get("a")  # must not move "a" behind "b"
+    now[0] += 31    # "a" has expired, "b" has not
+    store.set("c", {"n": 3})
+    assert len(store) == 2
+    assert store.get("a") is None and store.get("b") == {"n": 2}
+
+
+def test_maxsize_evicts_least_recently_written():
+    store = MemorySessionStore(maxsize=2, ttl=60)
+    store.set("a", {})
+    store.set("b", {})
+    store.get("a")
+    store.set("c", {})
+    assert store.get("a") is None and store.get("b") == {}
+
+
+def _concurrent_increments(store, n=20):
+    def increment(state):
+        state = dict(state or {"n": 0})
+        state["n"] += 1
+        return state
+    threads = [threading.Thread(target=store.update, args=("s", increment)) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return store.get("s")["n"]
+
+
+def test_memory_update_is_atomic():
+    assert _concurrent_increments(MemorySessionStore()) == 20
+
+
+def test_sqlite_update_is_atomic(tmp_path):
+    assert _concurrent_increments(SqliteSessionStore(str(tmp_path / "sessions.sqlite3"))) == 20
+
+
+def test_update_returning_none_keeps_state(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    store.set("s", {"n": 1})
+    assert store.update("s", lambda state: None) == {"n": 1}
+    assert store.update("unknown", lambda state: None) is None
@@ -0,0 +1,171 @@
+"""Lazily loaded topic packs for example.py.
+
+Every category of the topic quiz comes from one JSON file ({"data": [names],
+"coords": {name: {"type", "points"}}}). The categories and their files are
+declared in topics.json, in dropdown order:
+
+    all       name of the extra category combining every topic
+    topics    [{"name", "file"}]
+
+so adding a topic pack is a data change only. The registry only checks at
+startup which files exist; a file is parsed the first time its category is
+used and the result is cached. Missing or unreadable files disable their
+category instead of failing the import.
+"""
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+from geometry import close_ring
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+REGISTRY_SOURCE = "topics.json"
+
+FeatureRecord = namedtuple("FeatureRecord", ["category", "feature", "geometry_type", "geometry_points"])
+
+# records     FeatureRecords in file order
+# features    feature names in file order (may repeat)
+# distinct    each feature name once, in file order
+# ranks       feature name -> index in `distinct`
+# index       feature name -> its first FeatureRecord
+Topic = namedtuple("Topic", ["records", "features", "distinct", "ranks", "index"])
+
+
+def pack_geometry(rows, decimals=None):
+    """Move every row's [lat, lon] points into one contiguous float buffer.
+
+    Each row's "geometry_points" becomes a read-only (n, 2) view into the
+    buffer; polygons are closed here once instead of on every render. With
+    `decimals`, the points are rounded to that many places, which is all the
+    maps show and keeps the figure JSON short.
+    """
+    chunks = []
+    for row in rows:
+        pts = np.asarray(row["geometry_points"], dtype=np.float64).reshape(-1, 2)
+        if row["geometry_type"] == "polygon":
+            pts = close_ring(pts)
+        chunks.append(pts)
+    offsets = np.concatenate([[0], np.cumsum([len(pts) for pts in chunks], dtype=np.int64)])
+    buffer = np.concatenate(chunks) if chunks else np.empty((0, 2))
+    if decimals is not None:
+        buffer = np.round(buffer, decimals)
+    buffer.flags.writeable = False
+    for row, start, end in zip(rows, offsets[:-1], offsets[1:]):
+        row["geometry_points"] = buffer[start:end]
+    return buffer, offsets
+
+
+def _topic(records):
+    features = tuple(record.feature for record in records)
+    distinct = tuple(dict.fromkeys(features))
+    ranks = MappingProxyType({feature: i for i, feature in enumerate(distinct)})
+    index = {}
+    for record in records:
+        index.setdefault(record.feature, record)
+    return Topic(tuple(records), features, distinct, ranks, MappingProxyType(index))
+
+
+def parse_topic(cat_name, cat_data, decimals=None):
+    """Topic for one category from the parsed JSON of its file"""
+    rows = []
+    feats = cat_data.get("data", [])
+    coords = cat_data.get("coords", {})
+    for feat in feats:
+        info = coords.get(feat, {})
+        rows.append({
+            "category": cat_name,
+            "feature": feat,
+            "geometry_type": info.get("type", "point"),
+            "geometry_points": info.get("points", [])
+        })
+    pack_geometry(rows, decimals)
+    return _topic([FeatureRecord(**row) for row in rows])
+
+
+class TopicRegistry:
+    """Categories backed by topic files, loaded on first use.
+
+    `topics` is a list of (category, file name) pairs in display order;
+    `all_category` names the extra category that combines all of them.
+    `decimals` rounds all coordinates at load (see pack_geometry).
+    """
+
+    def __init__(self, topics, all_category, base_dir="", decimals=None):
+        self.all_category = all_category
+        self.decimals = decimals
+        self._paths = {category: os.path.join(base_dir, name) for category, name in topics}
+        self._topics = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+        self._available = []
+        for category, path in self._paths.items():
+            if os.path.isfile(path):
+                self._available.append(category)
+            else:
+                logger.warning("Topic file %s not found, category %r is disabled", path, category)
+
+    def categories(self):
+        """Categories whose file exists and has not failed to load, in display order"""
+        return [category for category in self._available if category not in self._failed]
+
+    def get(self, category):
+        """Topic for a category (or the combined one), or None if it is unavailable"""
+        topic = self._topics.get(category)
+        if topic is not None:
+            return topic
+        if category == self.all_category:
+            parts = [self.get(c) for c in self.categories()]
+            topic = _topic([record for part in parts if part is not None for record in part.records])
+        elif category in self._available and category not in self._failed:
+            topic = self._load(category)
+            if topic is None:
+                return None
+        else:
+            return None
+        with self._lock:
+            return self._topics.setdefault(category, topic)
+
+    def _load(self, category):
+        path = self._paths[category]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cat_data = json.load(f)
+            return parse_topic(category, cat_data, self.decimals)
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning("Could not load topic file %s (%s), category %r is disabled", path, e, category)
+            with self._lock:
+                self._failed.add(category)
+            return None
+
+    def feature(self, name):
+        """First record of a feature over all categories in display order, or None.
+
+        Categories before the one holding the feature get loaded on the way.
+        """
+        for category in self.categories():
+            topic = self.get(category)
+            if topic is not None and name in topic.index:
+                return topic.index[name]
+        return None
+
+    def preload(self):
+        """Load every available category now, e.g. before gunicorn forks its workers"""
+        for category in self.categories():
+            self.get(category)
+        self.get(self.all_category)
+
+
+def load_topic_registry(path=os.path.join(BASE_DIR, REGISTRY_SOURCE), base_dir="", decimals=None):
+    """TopicRegistry for the categories declared in topics.json"""
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    topics = [(entry["name"], entry["file"]) for entry in spec["topics"]]
+    return TopicRegistry(topics, spec["all"]["name"], base_dir=base_dir, decimals=decimals)